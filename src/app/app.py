@@ -1,15 +1,22 @@
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[2]))
 import streamlit as st
 import pandas as pd
 import numpy as np
 import boto3
-import joblib
 import os
 from dotenv import load_dotenv
 from pathlib import Path
-from utils.utils import read_csv_s3
+from functools import partial
+from utils.utils import read_csv_s3, load_concurrently, ArtifactLoadError
+from src.services.scoring import score_candidates, score_candidates_from_store, rank_candidates
+from src.services.feature_store import open_if_current
+from src.services.model_registry import ModelWatcher, load_active, load_artifact
+from src.services.monitoring import DriftMonitor, DriftSketch, REFERENCE_ARTIFACT
+from src.services.explain import ExplanationCache, explain_job
+from src.services.job_ranking import JobIndex, score_jobs_for_applicant, rank_jobs
 
 # Configuração da página
 st.set_page_config(
@@ -23,43 +30,80 @@ st.set_page_config(
 BASE_DIR = Path(__file__).parent.parent
 MODEL_PATH = BASE_DIR / "models" / "model.pkl"
 MODEL_COLUMNS_PATH = BASE_DIR / "models" / "model_columns.pkl"
+REGISTRY_DIR = BASE_DIR / "models" / "registry"
+FEATURE_STORE_DIR = BASE_DIR / "data" / "processed" / "feature_store"
+MODEL_POLL_SECONDS = float(os.getenv("MODEL_POLL_SECONDS", "10"))
+
+def start_model_watcher(initial_version):
+    """
+    Inicia a observação do registry a partir da versão já carregada. Chamado dentro de
+    `load_resources` (cacheado): o cache guarda apenas o watcher, e não a versão inicial,
+    então a versão antiga é liberada depois da primeira troca.
+    """
+    watcher = ModelWatcher(REGISTRY_DIR, poll_interval=MODEL_POLL_SECONDS,
+                           model_path=MODEL_PATH, columns_path=MODEL_COLUMNS_PATH,
+                           initial=initial_version)
+    return watcher.start()
+
+@st.cache_resource
+def get_explanation_cache():
+    """Cache das explicações por (versão do modelo, vaga), compartilhado entre sessões."""
+    return ExplanationCache(max_entries=256)
+
+@st.cache_resource
+def get_drift_monitor(model_version_id):
+    """Monitor de drift do processo para a versão do modelo (None se a versão não tiver referência)."""
+    reference = load_artifact(REFERENCE_ARTIFACT, model_version_id, str(REGISTRY_DIR))
+    if reference is None:
+        return None
+    return DriftMonitor(DriftSketch.from_dict(reference), model_version_id,
+                        monitoring_dir=str(BASE_DIR / "reports" / "monitoring"))
+
+@st.cache_resource
+def get_job_index(_store, _df_processed):
+    """Blocos de features por vaga para o ranking candidato -> vagas (montados uma vez por processo)."""
+    return JobIndex.build(_store, _df_processed)
+
+@st.cache_resource
+def load_featured_data():
+    """Carrega o CSV com features do S3 (usado quando a matriz memory-mapped não está disponível)."""
+    load_dotenv()
+    return read_csv_s3(os.getenv("AWS_BUCKET_NAME"), "feature_engineered_data.csv")
 
 # Cache para carregar recursos pesados apenas uma vez
 @st.cache_resource
 def load_resources():
     load_dotenv()
-    """Carrega o modelo, colunas e dados com cache para melhor performance."""
+    """
+    Carrega o modelo e os dados em paralelo, com cache para melhor performance.
+    Retorna o watcher do modelo (criado uma única vez por processo, com a versão carregada
+    aqui; a versão é trocada em background quando uma nova é publicada no registry).
+    """
     try:
         bucket_name = os.getenv("AWS_BUCKET_NAME")
-        # Carregar modelo
-        model = joblib.load(MODEL_PATH)
-        
-        # Carregar colunas do modelo
-        model_columns = joblib.load(MODEL_COLUMNS_PATH)
-        
-        # Carregar dados com features (para predição)
-        df_featured = read_csv_s3(bucket_name, "feature_engineered_data.csv")
-        
-        # Carregar dados processados (para exibição de informações legíveis)
-        df_processed = read_csv_s3(bucket_name, "preprocessed_data.csv")
-        
-        return model, model_columns, df_featured, df_processed
+        loaders = {
+            # Versão ativa do modelo (com as colunas)
+            "modelo": partial(load_active, REGISTRY_DIR, MODEL_PATH, MODEL_COLUMNS_PATH),
+            # Dados processados (para exibição de informações legíveis)
+            "preprocessed_data.csv": partial(read_csv_s3, bucket_name, "preprocessed_data.csv"),
+        }
+        # Dados com features (para predição): matriz memory-mapped compartilhada entre
+        # os processos do host, ou o CSV do S3 quando ela não existir
+        if (FEATURE_STORE_DIR / "metadata.json").exists():
+            # None se a matriz for de um formato anterior (o app usa o CSV do S3)
+            loaders["feature_store"] = partial(open_if_current, str(FEATURE_STORE_DIR))
+        else:
+            loaders["feature_engineered_data.csv"] = partial(read_csv_s3, bucket_name, "feature_engineered_data.csv")
+        loaded = load_concurrently(loaders)
+        return (start_model_watcher(loaded.pop("modelo")), loaded.get("feature_engineered_data.csv"),
+                loaded["preprocessed_data.csv"], loaded.get("feature_store"))
     
-    except FileNotFoundError as e:
-        st.error(f"Erro ao carregar arquivos: {e}")
+    except ArtifactLoadError as e:
+        for name, error in e.failures.items():
+            st.error(f"Erro ao carregar '{name}': {error}")
         st.error("Certifique-se de que o modelo foi treinado e os dados estão na pasta correta.")
         return None, None, None, None
 
-def prepare_data_for_prediction(df, model_columns):
-    """Prepara os dados para predição, alinhando com as colunas do modelo."""
-    # Aplicar one-hot encoding
-    df_processed = pd.get_dummies(df, dummy_na=True)
-    
-    # Alinhar com as colunas do modelo
-    df_aligned = df_processed.reindex(columns=model_columns, fill_value=0)
-    
-    return df_aligned
-
 def main():
     # Título principal
     st.title("🤖 Sistema Inteligente de Matching Vaga-Candidato")
@@ -71,19 +115,30 @@ def main():
     
     # Carregar recursos
     with st.spinner("Carregando modelo e dados... Por favor, aguarde."):
-        model, model_columns, df_featured, df_processed = load_resources()
+        watcher, df_featured, df_processed, store = load_resources()
     
-    if model is None:
+    if watcher is None:
         st.stop()
     
+    # Snapshot da versão ativa: usado do início ao fim desta execução,
+    # mesmo que uma nova versão seja trocada em background no meio dela
+    model_version = watcher.current()
+    model, model_columns = model_version.model, model_version.model_columns
+    
+    # A matriz só é usada se estiver alinhada às colunas da versão ativa do modelo
+    use_store = store is not None and store.columns == list(model_columns)
+    if not use_store and df_featured is None:
+        df_featured = load_featured_data()
+    
     # Sidebar com informações do modelo
     st.sidebar.header("📊 Informações do Modelo")
+    st.sidebar.metric("Versão do Modelo", model_version.version)
     st.sidebar.metric("Features Utilizadas", len(model_columns))
-    st.sidebar.metric("Total de Registros", len(df_featured))
+    st.sidebar.metric("Total de Registros", len(store) if use_store else len(df_featured))
     
     #Comentando tab2
     # Separar em abas para melhor organização
-    tab1, tab3 = st.tabs(["🎯 Análise por Vaga", "ℹ️ Sobre o Modelo"])
+    tab1, tab_candidato, tab3 = st.tabs(["🎯 Análise por Vaga", "👤 Vagas por Candidato", "ℹ️ Sobre o Modelo"])
     
     with tab1:
         st.header("Análise de Candidatos por Vaga")
@@ -104,27 +159,23 @@ def main():
                 if not job_data.empty:
                     job_id = job_data['job_id'].iloc[0]
                     
-                    # Filtrar candidatos para esta vaga no dataset com features
-                    df_job = df_featured[df_featured['job_id'] == job_id].copy()
+                    # Filtrar candidatos para esta vaga e fazer predições.
+                    # O monitor de drift é atualizado uma vez por sessão/vaga/versão,
+                    # já que o Streamlit reexecuta o script a cada interação.
+                    monitored = st.session_state.setdefault("drift_monitored", set())
+                    monitor_key = (model_version.version, job_id)
+                    monitor = None if monitor_key in monitored else get_drift_monitor(model_version.version)
+                    if use_store:
+                        df_job = score_candidates_from_store(model, store, job_id, monitor=monitor)
+                    else:
+                        df_job = score_candidates(model, model_columns, df_featured, job_id, monitor=monitor)
+                    monitored.add(monitor_key)
                     
                     if df_job.empty:
                         st.warning("Nenhum candidato encontrado para esta vaga no dataset processado.")
                     else:
-                        # Preparar dados para predição
-                        X_job = df_job.drop(columns=['target'], errors='ignore')
-                        X_job_prepared = prepare_data_for_prediction(X_job, model_columns)
-                        
-                        # Fazer predições
-                        probabilities = model.predict_proba(X_job_prepared)[:, 1]
-                        df_job['score_match'] = probabilities
-                        
                         # Juntar com dados processados para exibição
-                        display_data = pd.merge(
-                            df_job[['applicant_id', 'score_match']],
-                            df_processed[['applicant_id', 'nome', 'cv_experience_years', 'cv_total_skills']].drop_duplicates(subset=['applicant_id']),
-                            on='applicant_id',
-                            how='left'
-                        )
+                        display_data = rank_candidates(df_job, df_processed)
                         
                         # Controles de exibição
                         col1, col2 = st.columns(2)
@@ -132,10 +183,20 @@ def main():
                             top_n = st.slider("Número de candidatos a exibir:", 1, min(20, len(display_data)), 5)
                         with col2:
                             min_score = st.slider("Score mínimo:", 0.0, 1.0, 0.0, 0.05)
+                        show_drivers = st.checkbox("Mostrar principais fatores do score", value=True)
+                        
+                        # Filtrar (os dados já vêm ordenados por score)
+                        top_candidates = display_data[display_data['score_match'] >= min_score].head(top_n)
                         
-                        # Filtrar e ordenar
-                        filtered_data = display_data[display_data['score_match'] >= min_score]
-                        top_candidates = filtered_data.sort_values(by='score_match', ascending=False).head(top_n)
+                        if show_drivers and not top_candidates.empty:
+                            # Contribuições de todos os candidatos da vaga em uma única chamada (cacheada)
+                            explanations = explain_job(model_version, df_job, job_id=job_id,
+                                                       cache=get_explanation_cache(),
+                                                       store=store if use_store else None)
+                            top_candidates = top_candidates.merge(
+                                explanations.drop_duplicates(subset=['applicant_id']),
+                                on='applicant_id', how='left'
+                            )
                         
                         if top_candidates.empty:
                             st.warning("Nenhum candidato encontrado com o score mínimo especificado.")
@@ -156,11 +217,15 @@ def main():
                                         width="medium"
                                     ),
                                     "cv_experience_years": st.column_config.NumberColumn("Anos de Exp.", width="small"),
-                                    "cv_total_skills": st.column_config.NumberColumn("Nº de Skills", width="small")
+                                    "cv_total_skills": st.column_config.NumberColumn("Nº de Skills", width="small"),
+                                    "principais_fatores": st.column_config.TextColumn("Principais Fatores", width="large")
                                 },
                                 use_container_width=True,
                                 hide_index=True
                             )
+                            if show_drivers:
+                                st.caption("Principais fatores: contribuição de cada feature para o score (em log-odds). "
+                                           "Valores positivos aumentam a compatibilidade; negativos reduzem.")
                             
                             # Estatísticas rápidas
                             st.subheader("📊 Estatísticas dos Candidatos Selecionados")
@@ -181,6 +246,58 @@ def main():
         else:
             st.error("Coluna 'titulo_vaga' não encontrada nos dados processados.")
     
+    with tab_candidato:
+        st.header("Melhores Vagas para um Candidato")
+        
+        if not use_store:
+            st.info("Disponível apenas com a matriz de features do modelo ativo "
+                    "(gere com `python -m src.main build-store`).")
+        else:
+            applicant_id = st.text_input("Código do candidato:", help="applicant_id do candidato")
+            if applicant_id:
+                job_index = get_job_index(store, df_processed)
+                try:
+                    # Todas as vagas em uma única chamada do modelo
+                    jobs_scored = score_jobs_for_applicant(model, job_index, applicant_id.strip())
+                except KeyError:
+                    st.warning("Candidato não encontrado na matriz de features.")
+                else:
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        top_n_jobs = st.slider("Número de vagas a exibir:", 1, min(50, len(jobs_scored)), 10)
+                    with col2:
+                        min_score_jobs = st.slider("Score mínimo da vaga:", 0.0, 1.0, 0.0, 0.05)
+                    with col3:
+                        exclude_applied = st.checkbox("Ocultar vagas já candidatadas", value=False)
+                    
+                    top_jobs = rank_jobs(jobs_scored, job_index.job_info, top_n_jobs, min_score_jobs, exclude_applied)
+                    if top_jobs.empty:
+                        st.warning("Nenhuma vaga encontrada com o score mínimo especificado.")
+                    else:
+                        st.subheader(f"🏆 Top {len(top_jobs)} Vagas de {len(job_index)}")
+                        st.caption("Apenas vagas com ao menos uma candidatura; vagas sem candidaturas "
+                                   "(ex: recém-abertas) ainda não podem ser pontuadas, e vagas encerradas não são filtradas.")
+                        st.dataframe(
+                            top_jobs,
+                            column_config={
+                                "job_id": st.column_config.TextColumn("ID Vaga", width="small"),
+                                "titulo_vaga": st.column_config.TextColumn("Vaga", width="large"),
+                                "score_match": st.column_config.ProgressColumn(
+                                    "Score de Match",
+                                    format="%.3f",
+                                    min_value=0,
+                                    max_value=1,
+                                    width="medium"
+                                ),
+                                "candidatura_existente": st.column_config.CheckboxColumn("Já Candidatou", width="small"),
+                                "modalidade_vaga": st.column_config.TextColumn("Modalidade", width="small"),
+                                "perfil_vaga_cidade": st.column_config.TextColumn("Cidade", width="small"),
+                                "perfil_vaga_nivel_profissional": st.column_config.TextColumn("Nível", width="small")
+                            },
+                            use_container_width=True,
+                            hide_index=True
+                        )
+    
     # with tab2:
     #     st.header("📈 Estatísticas Gerais do Dataset")
         
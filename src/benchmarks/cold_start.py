@@ -0,0 +1,93 @@
+# src/benchmarks/cold_start.py
+"""
+Benchmark de cold start: carregamento sequencial vs. paralelo dos artefatos
+usados por `load_resources` (app) e por `pipeline_preprocessing` (JSONs brutos).
+
+    python -m src.benchmarks.cold_start
+    python -m src.benchmarks.cold_start --s3 --repeats 5
+
+Com carregamento paralelo, o tempo total deve ficar próximo ao do artefato mais lento.
+"""
+import argparse
+import os
+import time
+from functools import partial
+
+
+def _app_loaders(args) -> dict:
+    import pandas as pd
+    from src.services.model_registry import load_active
+    from src.utils.utils import read_csv_s3
+
+    models_dir = args.models_dir
+    loaders = {
+        "modelo": partial(load_active, os.path.join(models_dir, "registry"),
+                          os.path.join(models_dir, "model.pkl"), os.path.join(models_dir, "model_columns.pkl")),
+    }
+    for name in ("feature_engineered_data.csv", "preprocessed_data.csv"):
+        if args.s3:
+            loaders[name] = partial(read_csv_s3, os.getenv("AWS_BUCKET_NAME"), name)
+        else:
+            loaders[name] = partial(pd.read_csv, os.path.join(args.processed_dir, name))
+    return loaders
+
+
+def _preprocessing_loaders(args) -> dict:
+    from src.services.preprocessing import load_json
+
+    return {name: partial(load_json, os.path.join(args.raw_dir, f"{name}.json"), strict=True)
+            for name in ("applicants", "prospects", "vagas")}
+
+
+def benchmark(loaders: dict, repeats: int = 3) -> dict:
+    """Mede cada artefato isoladamente, a soma sequencial e o carregamento paralelo (melhor de N)."""
+    from src.utils.utils import load_concurrently
+
+    # Aquecimento: garante que falhas apareçam antes das medições
+    load_concurrently(loaders)
+
+    single = {name: float("inf") for name in loaders}
+    sequential, concurrent = float("inf"), float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for name, loader in loaders.items():
+            t0 = time.perf_counter()
+            loader()
+            single[name] = min(single[name], time.perf_counter() - t0)
+        sequential = min(sequential, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        load_concurrently(loaders)
+        concurrent = min(concurrent, time.perf_counter() - start)
+
+    return {"single": single, "sequential": sequential, "concurrent": concurrent,
+            "slowest": max(single.values())}
+
+
+def _print_result(title: str, result: dict):
+    print(f"\n=== {title} ===")
+    for name, seconds in result["single"].items():
+        print(f"  {name:<30} {seconds:8.3f}s")
+    print(f"  {'artefato mais lento':<30} {result['slowest']:8.3f}s")
+    print(f"  {'sequencial':<30} {result['sequential']:8.3f}s")
+    print(f"  {'paralelo':<30} {result['concurrent']:8.3f}s "
+          f"({result['sequential'] / result['concurrent']:.2f}x mais rápido)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de cold start dos artefatos")
+    parser.add_argument("--raw-dir", default=os.path.join("src", "data", "raw"))
+    parser.add_argument("--processed-dir", default=os.path.join("src", "data", "processed"))
+    parser.add_argument("--models-dir", default=os.path.join("src", "models"))
+    parser.add_argument("--s3", action="store_true", help="Lê os CSVs do S3 (como o app)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--skip-json", action="store_true", help="Não mede os JSONs brutos")
+    args = parser.parse_args(argv)
+
+    _print_result("load_resources (app)", benchmark(_app_loaders(args), args.repeats))
+    if not args.skip_json:
+        _print_result("pipeline_preprocessing (JSONs)", benchmark(_preprocessing_loaders(args), args.repeats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+# src/benchmarks/load_test.py
+"""
+Teste de carga headless do caminho de matching do app: selecionar vaga -> score -> ranking -> merge
+com os dados legíveis -> explicações, com N usuários simultâneos e tempo de reflexão entre as
+interações. Como no app, o monitor de drift é atualizado uma vez por usuário/vaga.
+Usa os artefatos locais (registry, feature store ou CSVs).
+
+    python -m src.benchmarks.load_test --users 10 --duration 60
+    python -m src.benchmarks.load_test --users 50 --think-time 2 --no-explain --output load.json
+
+Reporta throughput, percentis de latência (total e por etapa) e crescimento de memória (RSS).
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from functools import partial
+
+import numpy as np
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def _rss_mb() -> float:
+    """RSS atual do processo em MB (/proc no Linux; pico via resource nos demais sistemas)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class MemorySampler:
+    """Amostra o RSS do processo em background durante o teste."""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="memory-sampler", daemon=True)
+
+    def _run(self):
+        started = time.perf_counter()
+        while True:
+            self.samples.append((time.perf_counter() - started, _rss_mb()))
+            if self._stop.wait(self.interval):
+                break
+
+    def start(self) -> "MemorySampler":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.samples.append((self.samples[-1][0] if self.samples else 0.0, _rss_mb()))
+
+
+def load_artifacts(args):
+    """Carrega modelo, dados legíveis e features (matriz memory-mapped ou CSV), como o app."""
+    import pandas as pd
+    from src.services.feature_store import open_if_compatible
+    from src.services.model_registry import load_active
+    from src.utils.utils import load_concurrently
+
+    processed_dir, models_dir = args.processed_dir, args.models_dir
+    loaded = load_concurrently({
+        "modelo": partial(load_active, os.path.join(models_dir, "registry"),
+                          os.path.join(models_dir, "model.pkl"), os.path.join(models_dir, "model_columns.pkl")),
+        "preprocessed_data.csv": partial(pd.read_csv, os.path.join(processed_dir, "preprocessed_data.csv")),
+    })
+    model_version = loaded["modelo"]
+    store = None if args.no_store else open_if_compatible(
+        os.path.join(processed_dir, "feature_store"), model_version.model_columns)
+    df_featured = None
+    if store is None:
+        df_featured = pd.read_csv(os.path.join(processed_dir, "feature_engineered_data.csv"))
+    return model_version, loaded["preprocessed_data.csv"], df_featured, store
+
+
+def load_drift_monitor(model_version, registry_dir: str, monitoring_dir: str):
+    """Monitor de drift da versão, como o do app (None se a versão não tiver referência)."""
+    from src.services.model_registry import load_artifact
+    from src.services.monitoring import REFERENCE_ARTIFACT, DriftMonitor, DriftSketch
+
+    reference = load_artifact(REFERENCE_ARTIFACT, model_version.version, registry_dir)
+    if reference is None:
+        print(f"⚠️ Versão {model_version.version} sem referência de drift; o monitor não será atualizado.")
+        return None
+    return DriftMonitor(DriftSketch.from_dict(reference), model_version.version, monitoring_dir=monitoring_dir)
+
+
+def job_candidate_counts(df_featured, store) -> dict:
+    """Número de candidatos por vaga nos dados de scoring (distribuição real por vaga)."""
+    if store is not None:
+        return {job: stop - start for job, (start, stop) in store.metadata["job_offsets"].items()}
+    from src.services.scoring import normalize_ids
+
+    jobs, counts = np.unique(normalize_ids(df_featured["job_id"]), return_counts=True)
+    return {job: int(n) for job, n in zip(jobs, counts) if job}
+
+
+class LoadTest:
+    """
+    Executa o caminho de matching com `users` threads simultâneas (como as sessões do Streamlit,
+    que compartilham o processo, o modelo e os dados). Cada usuário escolhe uma vaga pelo título,
+    pontua e ordena os candidatos e espera um tempo de reflexão (exponencial) antes da próxima.
+    monitor: DriftMonitor atualizado na primeira vez que cada usuário pontua cada vaga
+    (no app, uma vez por sessão/vaga).
+    """
+
+    def __init__(self, model_version, df_processed, df_featured=None, store=None,
+                 think_time: float = 1.0, explain: bool = True, weighted_jobs: bool = True, seed: int = 42,
+                 monitor=None):
+        self.model_version = model_version
+        self.df_processed = df_processed
+        self.df_featured = df_featured
+        self.store = store
+        self.think_time = think_time
+        self.explain = explain
+        self.seed = seed
+        self.monitor = monitor
+        self._monitored = set()
+
+        from src.services.scoring import normalize_ids
+
+        # Apenas vagas com título e candidatos pontuáveis; com `weighted_jobs`, vagas com mais
+        # candidatos são escolhidas com mais frequência (são as mais consultadas pelos recrutadores)
+        counts = job_candidate_counts(df_featured, store)
+        titles = df_processed.dropna(subset=["titulo_vaga"]).drop_duplicates(subset=["titulo_vaga"])
+        job_keys = normalize_ids(titles["job_id"])
+        scorable = np.isin(job_keys, list(counts))
+        titles, job_keys = titles[scorable], job_keys[scorable]
+        if titles.empty:
+            raise ValueError("Nenhuma vaga com título e candidatos nos dados informados")
+        self.job_titles = titles["titulo_vaga"].tolist()
+        self.job_sizes = [counts[j] for j in job_keys]
+        self.job_weights = self.job_sizes if weighted_jobs else None
+
+        self.cache = None
+        if explain:
+            from src.services.explain import ExplanationCache
+            self.cache = ExplanationCache(max_entries=256)
+        self._lock = threading.Lock()
+        self.results = []
+        self.errors = []
+
+    def _monitor_for(self, user_id, job_id):
+        """O monitor na primeira vez que o usuário pontua a vaga; None nas demais (e no aquecimento)."""
+        if self.monitor is None or user_id is None:
+            return None
+        key = (user_id, str(job_id))
+        with self._lock:
+            if key in self._monitored:
+                return None
+            self._monitored.add(key)
+        return self.monitor
+
+    def request(self, title: str, user_id=None) -> dict:
+        """Uma interação do recrutador. Retorna a latência de cada etapa (s)."""
+        from src.services.scoring import rank_candidates, score_candidates, score_candidates_from_store
+
+        timings = {}
+        t0 = time.perf_counter()
+        job_data = self.df_processed[self.df_processed["titulo_vaga"] == title]
+        job_id = job_data["job_id"].iloc[0]
+        t1 = time.perf_counter()
+        timings["select_job"] = t1 - t0
+
+        model_version = self.model_version
+        monitor = self._monitor_for(user_id, job_id)
+        if self.store is not None:
+            df_job = score_candidates_from_store(model_version.model, self.store, job_id, monitor=monitor)
+        else:
+            df_job = score_candidates(model_version.model, model_version.model_columns, self.df_featured, job_id,
+                                      monitor=monitor)
+        t2 = time.perf_counter()
+        timings["score"] = t2 - t1
+
+        ranked = rank_candidates(df_job, self.df_processed)
+        t3 = time.perf_counter()
+        timings["rank_merge"] = t3 - t2
+
+        if self.explain and not ranked.empty:
+            from src.services.explain import explain_job
+            explanations = explain_job(model_version, df_job, job_id=job_id, cache=self.cache, store=self.store)
+            ranked = ranked.head(20).merge(explanations.drop_duplicates(subset=["applicant_id"]), on="applicant_id", how="left")
+            timings["explain"] = time.perf_counter() - t3
+
+        timings["total"] = time.perf_counter() - t0
+        timings["candidates"] = len(df_job)
+        timings["drift_update"] = monitor is not None
+        return timings
+
+    def _user(self, user_id: int, deadline: float, max_requests, start_delay: float):
+        rng = random.Random(self.seed + user_id)
+        time.sleep(start_delay)
+        done = 0
+        while time.perf_counter() < deadline and (max_requests is None or done < max_requests):
+            title = rng.choices(self.job_titles, weights=self.job_weights)[0]
+            try:
+                timings = self.request(title, user_id)
+            except Exception as e:
+                with self._lock:
+                    self.errors.append(f"{type(e).__name__}: {e}")
+            else:
+                with self._lock:
+                    self.results.append(timings)
+            done += 1
+            if self.think_time > 0:
+                time.sleep(rng.expovariate(1.0 / self.think_time))
+
+    def run(self, users: int, duration: float, max_requests=None, ramp_up: float = 0.0,
+            warmup: int = 3) -> dict:
+        """Executa o teste e retorna o relatório (throughput, latências e memória)."""
+        # Aquecimento fora da medição: primeira chamada do modelo, page faults da matriz, etc.
+        for title in self.job_titles[:warmup]:
+            self.request(title)
+
+        sampler = MemorySampler().start()
+        started = time.perf_counter()
+        deadline = started + duration
+        threads = [
+            threading.Thread(target=self._user, name=f"user-{i}",
+                             args=(i, deadline, max_requests, ramp_up * i / max(users, 1)), daemon=True)
+            for i in range(users)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+        sampler.stop()
+        return self.report(users, elapsed, sampler.samples)
+
+    def report(self, users: int, elapsed: float, memory_samples: list) -> dict:
+        stages = ["total", "select_job", "score", "rank_merge"] + (["explain"] if self.explain else [])
+        latencies = {}
+        for stage in stages:
+            values = np.array([r[stage] for r in self.results if stage in r]) * 1000
+            if values.size:
+                latencies[stage] = {f"p{p}": round(float(np.percentile(values, p)), 2) for p in PERCENTILES}
+                latencies[stage]["mean"] = round(float(values.mean()), 2)
+                latencies[stage]["max"] = round(float(values.max()), 2)
+        rss = [mb for _, mb in memory_samples]
+        candidates = np.array([r["candidates"] for r in self.results]) if self.results else np.array([0])
+        drift_updates = sum(r["drift_update"] for r in self.results)
+        return {
+            "model_version": self.model_version.version,
+            "source": "feature_store" if self.store is not None else "csv",
+            "users": users,
+            "think_time_s": self.think_time,
+            "explain": self.explain,
+            "drift_updates": drift_updates if self.monitor is not None else None,
+            "duration_s": round(elapsed, 2),
+            "requests": len(self.results),
+            "errors": len(self.errors),
+            "error_samples": self.errors[:5],
+            "throughput_rps": round(len(self.results) / elapsed, 2) if elapsed else 0.0,
+            "candidates_per_request": {"mean": round(float(candidates.mean()), 1), "max": int(candidates.max())},
+            "jobs": {"n": len(self.job_titles), "median_candidates": float(np.median(self.job_sizes)),
+                     "max_candidates": int(max(self.job_sizes))},
+            "latency_ms": latencies,
+            "memory_mb": {
+                "start": round(rss[0], 1) if rss else None,
+                "end": round(rss[-1], 1) if rss else None,
+                "peak": round(max(rss), 1) if rss else None,
+                "growth": round(rss[-1] - rss[0], 1) if rss else None,
+            },
+        }
+
+
+def print_report(report: dict):
+    print(f"\n=== Teste de carga: {report['users']} usuários, {report['duration_s']}s "
+          f"(modelo {report['model_version']}, dados: {report['source']}) ===")
+    print(f"Requisições: {report['requests']} ({report['errors']} erros) | "
+          f"throughput: {report['throughput_rps']} req/s | "
+          f"candidatos por vaga: média {report['candidates_per_request']['mean']}, "
+          f"máx {report['candidates_per_request']['max']}")
+    drift = "desligado" if report["drift_updates"] is None else f"{report['drift_updates']} atualizações"
+    print(f"Explicações: {'sim' if report['explain'] else 'não'} | monitor de drift: {drift}")
+    print(f"{'etapa':<12}" + "".join(f"{f'p{p}':>10}" for p in PERCENTILES) + f"{'máx':>10}  (ms)")
+    for stage, values in report["latency_ms"].items():
+        print(f"{stage:<12}" + "".join(f"{values[f'p{p}']:>10.1f}" for p in PERCENTILES) + f"{values['max']:>10.1f}")
+    mem = report["memory_mb"]
+    print(f"Memória (RSS): início {mem['start']} MB, fim {mem['end']} MB, pico {mem['peak']} MB, "
+          f"crescimento {mem['growth']} MB")
+    for error in report["error_samples"]:
+        print(f"❌ {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga do caminho de matching (usuários simultâneos)")
+    parser.add_argument("--processed-dir", default=os.path.join("src", "data", "processed"))
+    parser.add_argument("--models-dir", default=os.path.join("src", "models"))
+    parser.add_argument("--users", type=int, default=10, help="Usuários simultâneos")
+    parser.add_argument("--duration", type=float, default=30.0, help="Duração do teste (s)")
+    parser.add_argument("--max-requests", type=int, default=None, help="Limite de requisições por usuário")
+    parser.add_argument("--think-time", type=float, default=1.0,
+                        help="Tempo médio de reflexão entre interações (s, distribuição exponencial)")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="Tempo para todos os usuários iniciarem (s)")
+    parser.add_argument("--uniform-jobs", action="store_true",
+                        help="Escolhe vagas uniformemente (padrão: proporcional ao número de candidatos)")
+    parser.add_argument("--no-explain", action="store_true",
+                        help="Não gera as explicações dos scores (o app sempre as exibe)")
+    parser.add_argument("--no-drift", action="store_true", help="Não atualiza o monitor de drift")
+    parser.add_argument("--monitoring-dir", default=None,
+                        help="Onde o monitor grava os sketches (padrão: diretório temporário, para não "
+                             "misturar o tráfego sintético com o monitoramento real)")
+    parser.add_argument("--no-store", action="store_true", help="Usa o CSV com features mesmo se a matriz existir")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="JSON com o relatório")
+    args = parser.parse_args(argv)
+
+    model_version, df_processed, df_featured, store = load_artifacts(args)
+    monitor = None
+    if not args.no_drift:
+        monitoring_dir = args.monitoring_dir or tempfile.mkdtemp(prefix="load_test_monitoring_")
+        monitor = load_drift_monitor(model_version, os.path.join(args.models_dir, "registry"), monitoring_dir)
+    test = LoadTest(model_version, df_processed, df_featured, store, think_time=args.think_time,
+                    explain=not args.no_explain, weighted_jobs=not args.uniform_jobs, seed=args.seed,
+                    monitor=monitor)
+    report = test.run(args.users, args.duration, args.max_requests, args.ramp_up)
+    print_report(report)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Relatório salvo em: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# src/benchmarks/native_predict.py
+"""
+Benchmark do modelo: joblib (LGBMClassifier + wrapper do scikit-learn) vs. bundle nativo do
+LightGBM (Booster em texto + NativePredictor sobre arrays float32).
+
+    python -m src.benchmarks.native_predict
+    python -m src.benchmarks.native_predict --model-version v0003 --batch-sizes 1 50 500 5000
+
+Sem registry, usa o model.pkl legado (como o CLI), com o bundle em `<models-dir>/native/`.
+
+Mede o tempo de carregamento e a latência de predição por lote, e confere que os scores
+dos dois caminhos coincidem.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+DEFAULT_BATCH_SIZES = (1, 10, 100, 1000, 10000)
+
+
+def _best_of(func, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _sample_rows(args, model_columns, n_rows: int, rng) -> np.ndarray:
+    """Linhas reais da matriz de features quando disponível; caso contrário, valores aleatórios."""
+    from src.services.feature_store import open_if_compatible
+
+    store = open_if_compatible(os.path.join(args.processed_dir, "feature_store"), model_columns)
+    if store is not None and len(store):
+        rows = rng.integers(0, len(store), n_rows)
+        return np.asarray(store.X[np.sort(rows)], dtype=np.float32)
+    print("⚠️ Matriz de features não encontrada; usando valores aleatórios.")
+    return rng.random((n_rows, len(model_columns)), dtype=np.float32)
+
+
+def _model_files(args, registry_dir, version) -> tuple:
+    """Arquivos joblib (modelo, colunas) da versão; o modelo legado fica fora do registry."""
+    from src.services.model_registry import COLUMNS_FILE, MODEL_FILE
+
+    if version == "legacy":
+        return os.path.join(args.models_dir, "model.pkl"), os.path.join(args.models_dir, "model_columns.pkl")
+    version_dir = os.path.join(registry_dir, version)
+    return os.path.join(version_dir, MODEL_FILE), os.path.join(version_dir, COLUMNS_FILE)
+
+
+def benchmark(args) -> dict:
+    import lightgbm  # noqa: F401  (importado antes das medições: o custo do import é igual nos dois caminhos)
+    from src.services.model_registry import load_active, load_version
+    from src.services.native_model import BUNDLE_FILE, export_native_bundle, native_bundle_dir
+
+    # Mesma resolução do CLI: versão pedida, versão ativa ou o model.pkl legado
+    registry_dir = os.path.join(args.models_dir, "registry")
+    if args.model_version:
+        model_version = load_version(args.model_version, registry_dir)
+    else:
+        model_version = load_active(registry_dir, os.path.join(args.models_dir, "model.pkl"),
+                                    os.path.join(args.models_dir, "model_columns.pkl"))
+    version = model_version.version
+    model, model_columns = model_version.model, model_version.model_columns
+
+    bundle_dir = native_bundle_dir(version, registry_dir, pruned=args.prune)
+    if not os.path.exists(os.path.join(bundle_dir, BUNDLE_FILE)):
+        if args.prune:
+            raise SystemExit(f"Bundle podado não encontrado em {bundle_dir}; "
+                             f"execute `python -m src.main export-native --prune`.")
+        threshold = model_version.metadata.get("threshold", 0.5)
+        export_native_bundle(model, model_columns, threshold, bundle_dir, model_version=version)
+    return _measure(args, version, _model_files(args, registry_dir, version), model, model_columns, bundle_dir)
+
+
+def _measure(args, version, model_files, model, model_columns, bundle_dir) -> dict:
+    import joblib
+    import pandas as pd
+    from src.services.native_model import NativePredictor
+
+    model_path, columns_path = model_files
+    load = {
+        "joblib": _best_of(lambda: (joblib.load(model_path), joblib.load(columns_path)), args.repeats),
+        "nativo": _best_of(lambda: NativePredictor.load(bundle_dir), args.repeats),
+    }
+    predictor = NativePredictor.load(bundle_dir)
+
+    rng = np.random.default_rng(42)
+    X_all = _sample_rows(args, model_columns, max(args.batch_sizes), rng)
+    latency = []
+    for size in args.batch_sizes:
+        X = X_all[:size]
+        X_frame = pd.DataFrame(X, columns=model_columns)
+        sklearn_s = _best_of(lambda: model.predict_proba(X_frame)[:, 1], args.repeats)
+        native_s = _best_of(lambda: predictor.score(X), args.repeats)
+        diff = float(np.max(np.abs(model.predict_proba(X_frame)[:, 1] - predictor.score(X))))
+        latency.append({"batch": size, "sklearn_ms": sklearn_s * 1000, "nativo_ms": native_s * 1000,
+                        "speedup": sklearn_s / native_s, "max_diff": diff})
+    return {"version": version, "bundle": predictor.metadata, "load_s": load, "latency": latency}
+
+
+def print_result(result: dict):
+    bundle = result["bundle"]
+    print(f"\n=== Modelo {result['version']}: {bundle['num_iteration']}/{bundle['total_iterations']} iterações "
+          f"no bundle nativo ===")
+    if bundle.get("pruned"):
+        print(f"Bundle podado: os scores diferem do modelo completo (threshold {bundle['threshold']:.2f}); "
+              f"a 'dif. máx.' mede essa diferença, não um erro de exportação")
+    load = result["load_s"]
+    print(f"Carregamento: joblib {load['joblib'] * 1000:.1f} ms | nativo {load['nativo'] * 1000:.1f} ms "
+          f"({load['joblib'] / load['nativo']:.2f}x)")
+    print(f"{'lote':>8} {'sklearn (ms)':>14} {'nativo (ms)':>13} {'speedup':>9} {'dif. máx.':>11}")
+    for r in result["latency"]:
+        print(f"{r['batch']:>8} {r['sklearn_ms']:>14.3f} {r['nativo_ms']:>13.3f} {r['speedup']:>8.2f}x {r['max_diff']:>11.2e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark joblib vs. bundle nativo do LightGBM")
+    parser.add_argument("--processed-dir", default=os.path.join("src", "data", "processed"))
+    parser.add_argument("--models-dir", default=os.path.join("src", "models"))
+    parser.add_argument("--model-version", default=None, help="Versão do registry (padrão: versão ativa)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=list(DEFAULT_BATCH_SIZES))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--prune", action="store_true",
+                        help="Mede o bundle podado da versão (gerado por `export-native --prune`)")
+    args = parser.parse_args(argv)
+    print_result(benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
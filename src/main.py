@@ -1,59 +1,541 @@
 # main.py
+"""
+CLI do pipeline de matching vaga-candidato.
+
+    python -m src.main                 # pipeline completo (equivale a `all`, executado como DAG)
+    python -m src.main preprocess      # apenas pré-processamento
+    python -m src.main features        # apenas engenharia de features
+    python -m src.main train
+    python -m src.main evaluate
+    python -m src.main build-store     # matriz de features memory-mapped para o modelo ativo
+    python -m src.main export-native   # booster no formato nativo do LightGBM para o modelo ativo
+    python -m src.main score --job-id 1234 --top-n 10
+    python -m src.main rank-jobs --applicant-id 31000 --top-n 10   # melhores vagas para um candidato
+    python -m src.main drift           # drift do tráfego monitorado vs. referência do treino
+    python -m src.main startup-time    # mede o tempo de import de cada comando
+
+As dependências pesadas (optuna, lightgbm, matplotlib/seaborn, boto3, category_encoders)
+são importadas apenas dentro do comando que as utiliza.
+"""
+import argparse
+import json
 import os
-import pandas as pd
-from src.services.preprocessing import pipeline_preprocessing
-from src.services.feature_engineering import feature_engineering
-from src.services.train import pipeline_train
-from src.services.evaluate import pipeline_evaluate
-from src.utils.utils import upload_csv_to_s3
-
-def main():
-    # Paths dos arquivos
-    MODEL_PATH = r"src\models\model.pkl"
-
-    applicants_path = r"src/data/raw/applicants.json"
-    prospects_path = r"src/data/raw/prospects.json"
-    vagas_path = r"src/data/raw/vagas.json"
-
-    preprocessed_csv = r"src/data/processed/preprocessed_data.csv"
-    feature_engineered_csv = r"src/data/processed/feature_engineered_data.csv"
-
-    # ---------------------------
-    # 1) Pré-processamento
-    # ---------------------------
+import subprocess
+import sys
+import time
+
+from src.utils import instrumentation
+from src.utils.instrumentation import span
+
+# Módulos importados por cada comando (usados também pela medição de startup)
+COMMAND_MODULES = {
+    "preprocess": ["src.services.preprocessing", "src.utils.utils"],
+    "features": ["src.services.feature_engineering", "src.utils.utils"],
+    "train": ["src.services.train"],
+    "evaluate": ["src.services.evaluate"],
+    "score": ["src.services.scoring", "src.services.model_registry", "src.services.feature_store", "src.utils.utils"],
+    "drift": ["src.services.monitoring", "src.services.model_registry"],
+    "rank-jobs": ["src.services.job_ranking", "src.services.model_registry", "src.services.feature_store"],
+}
+HEAVY_MODULES = ["optuna", "lightgbm", "matplotlib", "seaborn", "boto3", "category_encoders"]
+SUBCOMMANDS = ("all", "preprocess", "features", "train", "evaluate", "build-store", "export-native", "score", "rank-jobs",
+               "drift", "startup-time")
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _paths(args) -> dict:
+    """Monta os caminhos dos artefatos a partir dos diretórios configurados."""
+    return {
+        "applicants": os.path.join(args.raw_dir, "applicants.json"),
+        "prospects": os.path.join(args.raw_dir, "prospects.json"),
+        "vagas": os.path.join(args.raw_dir, "vagas.json"),
+        "preprocessed_csv": os.path.join(args.processed_dir, "preprocessed_data.csv"),
+        "feature_engineered_csv": os.path.join(args.processed_dir, "feature_engineered_data.csv"),
+        "model": os.path.join(args.models_dir, "model.pkl"),
+        "model_columns": os.path.join(args.models_dir, "model_columns.pkl"),
+        "registry": os.path.join(args.models_dir, "registry"),
+        "monitoring": args.monitoring_dir,
+        "feature_store": os.path.join(args.processed_dir, "feature_store"),
+        "metrics": args.metrics_dir,
+    }
+
+
+# ---------------------------
+# Comandos
+# ---------------------------
+
+def _preprocess(args):
+    from src.services.preprocessing import pipeline_preprocessing
+
+    paths = _paths(args)
     print("=== Iniciando Pré-processamento ===")
-    df, encoders, scaler = pipeline_preprocessing(applicants_path, prospects_path, vagas_path)
-    df.to_csv(preprocessed_csv, index=False, encoding="utf-8")
-    upload_csv_to_s3(preprocessed_csv, "preprocessed_data.csv")
-    print(f"CSV pré-processado salvo em: {preprocessed_csv}")
-
-    # ---------------------------
-    # 2) Feature Engineering
-    # ---------------------------
+    with span("preprocessing") as s:
+        df, encoders, scaler = pipeline_preprocessing(paths["applicants"], paths["prospects"], paths["vagas"])
+        os.makedirs(args.processed_dir, exist_ok=True)
+        df.to_csv(paths["preprocessed_csv"], index=False, encoding="utf-8")
+        s.set(rows=len(df), columns=len(df.columns))
+    print(f"CSV pré-processado salvo em: {paths['preprocessed_csv']}")
+
+
+def _features(args):
+    import pandas as pd
+    from src.services.feature_engineering import feature_engineering
+
+    paths = _paths(args)
     print("\n=== Iniciando Feature Engineering ===")
-    df = pd.read_csv(preprocessed_csv, parse_dates=True)
-    df = feature_engineering(df)
-    df.to_csv(feature_engineered_csv, index=False, encoding="utf-8")
-    upload_csv_to_s3(feature_engineered_csv, "feature_engineered_data.csv")
-    print(f"CSV com features geradas salvo em: {feature_engineered_csv}")
-
-    # ---------------------------
-    # 3) Treinamento
-    # ---------------------------
+    with span("feature_engineering") as s:
+        df = pd.read_csv(paths["preprocessed_csv"], parse_dates=True)
+        df = feature_engineering(df)
+        df.to_csv(paths["feature_engineered_csv"], index=False, encoding="utf-8")
+        s.set(rows=len(df), columns=len(df.columns))
+    print(f"CSV com features geradas salvo em: {paths['feature_engineered_csv']}")
+
+
+def _upload(local_path: str, s3_key: str, raise_on_error: bool = False):
+    from src.utils.utils import upload_csv_to_s3
+    upload_csv_to_s3(local_path, s3_key, raise_on_error=raise_on_error)
+
+
+def run_preprocess(args):
+    _preprocess(args)
+    if not args.no_upload:
+        _upload(_paths(args)["preprocessed_csv"], "preprocessed_data.csv")
+
+
+def run_features(args):
+    _features(args)
+    if not args.no_upload:
+        _upload(_paths(args)["feature_engineered_csv"], "feature_engineered_data.csv")
+
+
+def run_train(args):
+    from src.services.train import pipeline_train
+
+    paths = _paths(args)
     print("\n=== Iniciando Treinamento ===")
-    pipeline_train()
+    with span("train"):
+        pipeline_train(paths["feature_engineered_csv"], paths["model"], paths["model_columns"], paths["registry"],
+                       paths["feature_store"], neg_sample_rate=args.neg_sample_rate, refit_full=args.refit_full,
+                       compare_downsampling=args.compare_downsampling)
+
+
+def run_evaluate(args, data=None):
+    from src.services.evaluate import pipeline_evaluate
 
-    # ---------------------------
-    # 4) Validação
-    # ---------------------------
+    paths = _paths(args)
     print("\n=== Iniciando Avaliações de Métricas===")
-    pipeline_evaluate()
+    with span("evaluate"):
+        pipeline_evaluate(paths["model"], paths["feature_engineered_csv"], paths["model_columns"], paths["metrics"],
+                          paths["feature_store"], data=data)
+
+
+def _load_evaluation_data(args, shared: dict):
+    from src.services.evaluate import load_evaluation_data
+
+    shared["evaluation_data"] = load_evaluation_data(_paths(args)["feature_engineered_csv"])
+
+
+def _load_model_version(args, paths):
+    from src.services.model_registry import load_active, load_version
+
+    if getattr(args, "model_version", None):
+        return load_version(args.model_version, paths["registry"])
+    return load_active(paths["registry"], paths["model"], paths["model_columns"])
+
+
+def run_build_store(args):
+    from src.services.feature_store import write_feature_matrix
+    from src.utils.utils import load_dataset
+
+    paths = _paths(args)
+    model_version = _load_model_version(args, paths)
+    with span("feature_store") as s:
+        df = load_dataset(paths["feature_engineered_csv"])
+        write_feature_matrix(df, model_version.model_columns, paths["feature_store"], model_version.version)
+        s.set(rows=len(df))
+
+
+def _load_aligned_data(paths, model_columns):
+    """Features alinhadas às colunas do modelo e target, na ordem do CSV (matriz ou CSV + get_dummies)."""
+    from src.services.feature_store import open_if_compatible
+    from src.services.scoring import TARGET_COL, prepare_data_for_prediction
+    from src.utils.utils import load_dataset
+
+    store = open_if_compatible(paths["feature_store"], model_columns)
+    if store is not None:
+        original = store.original_order()
+        return store.X[original], store.y[original]
+    df = load_dataset(paths["feature_engineered_csv"])
+    return prepare_data_for_prediction(df.drop(columns=[TARGET_COL]), model_columns), df[TARGET_COL]
+
+
+def run_export_native(args):
+    from src.services.native_model import export_native_bundle, export_pruned_bundle, native_bundle_dir
+
+    paths = _paths(args)
+    model_version = _load_model_version(args, paths)
+    bundle_dir = native_bundle_dir(model_version.version, paths["registry"], pruned=args.prune)
+    # Versões publicadas são imutáveis: o bundle podado vai para um diretório próprio,
+    # e `score --native` só o usa com `--pruned`
+    if os.path.exists(bundle_dir):
+        print(f"Bundle nativo já existe em {bundle_dir}; nada a fazer.")
+        return
+    with span("export_native", prune=args.prune):
+        if args.prune:
+            X, y = _load_aligned_data(paths, model_version.model_columns)
+            export_pruned_bundle(model_version.model, model_version.model_columns, X, y, bundle_dir,
+                                 model_version=model_version.version)
+        else:
+            threshold = model_version.metadata.get("threshold", 0.5)
+            export_native_bundle(model_version.model, model_version.model_columns, threshold, bundle_dir,
+                                 model_version=model_version.version)
+
+
+def run_score(args):
+    import pandas as pd
+    from src.services.scoring import normalize_ids, score_candidates, score_candidates_from_store, rank_candidates
+    from src.services.feature_store import open_if_compatible
+    from src.utils.utils import load_dataset
+
+    paths = _paths(args)
+    with span("score") as s:
+        model_version = _load_model_version(args, paths)
+        print(f"Usando modelo versão: {model_version.version}")
+        model, model_columns = model_version.model, model_version.model_columns
+        if args.pruned and not args.native:
+            raise SystemExit("--pruned requer --native")
+        if args.native:
+            # Scores pelo booster nativo (mesmas probabilidades; explicações continuam no modelo completo)
+            from src.services.native_model import load_native
+            model = load_native(model_version.version, paths["registry"], pruned=args.pruned)
+            if args.pruned and model.metadata["pruned"]:
+                print(f"⚠️ Bundle podado ({model.metadata['num_iteration']}/{model.metadata['total_iterations']} "
+                      f"iterações, threshold {model.threshold:.2f}): os scores diferem do modelo completo"
+                      + (" e as explicações se referem ao modelo completo." if args.explain else "."))
+        monitor = None
+        if args.monitor:
+            from src.services.model_registry import load_artifact
+            from src.services.monitoring import DriftMonitor, DriftSketch, REFERENCE_ARTIFACT
+            reference = load_artifact(REFERENCE_ARTIFACT, model_version.version, paths["registry"])
+            if reference is None:
+                print(f"⚠️ Versão {model_version.version} sem sketch de referência; monitoramento desativado.")
+            else:
+                monitor = DriftMonitor(DriftSketch.from_dict(reference), model_version.version, paths["monitoring"])
+
+        # Matriz memory-mapped quando disponível; caso contrário, CSV + get_dummies
+        store = open_if_compatible(paths["feature_store"], model_columns)
+        job_id = args.job_id
+        if store is not None:
+            df_scored = score_candidates_from_store(model, store, job_id, monitor=monitor)
+        else:
+            df_featured = load_dataset(paths["feature_engineered_csv"])
+            if job_id is not None:
+                # job_id é lido do CSV como inteiro quando possível
+                job_id = pd.Series([job_id]).astype(df_featured['job_id'].dtype).iloc[0]
+            df_scored = score_candidates(model, model_columns, df_featured, job_id, monitor=monitor)
+        if monitor is not None:
+            monitor.flush()
+        s.set(rows=len(df_scored))
+
+    if os.path.exists(paths["preprocessed_csv"]):
+        df_processed = pd.read_csv(paths["preprocessed_csv"])
+        result = rank_candidates(df_scored, df_processed, args.top_n, args.min_score)
+    else:
+        result = df_scored[['job_id', 'applicant_id', 'score_match']].assign(
+            applicant_id=lambda d: normalize_ids(d['applicant_id']))
+        result = result[result['score_match'] >= args.min_score].sort_values(by='score_match', ascending=False)
+        result = result.head(args.top_n) if args.top_n else result
+
+    if args.explain:
+        from src.services.explain import explain_job
+        explanations = explain_job(model_version, df_scored, job_id=job_id, k=args.explain, store=store)
+        result = result.merge(explanations.drop_duplicates(subset=['applicant_id']), on='applicant_id', how='left')
+
+    if args.output:
+        result.to_csv(args.output, index=False, encoding="utf-8")
+        print(f"Scores salvos em: {args.output}")
+    else:
+        print(result.to_string(index=False))
+
+
+def run_rank_jobs(args):
+    import pandas as pd
+    from src.services.feature_store import open_if_compatible
+    from src.services.job_ranking import JobIndex, rank_jobs, score_jobs_for_applicant
+
+    paths = _paths(args)
+    model_version = _load_model_version(args, paths)
+    print(f"Usando modelo versão: {model_version.version}")
+    # O ranking reverso usa os blocos por vaga da matriz memory-mapped
+    store = open_if_compatible(paths["feature_store"], model_version.model_columns)
+    if store is None:
+        raise SystemExit("Matriz de features não encontrada para o modelo; execute `python -m src.main build-store`.")
+    with span("job_index") as s:
+        job_index = JobIndex.build(store, pd.read_csv(paths["preprocessed_csv"]))
+        s.set(jobs=len(job_index))
+
+    started = time.perf_counter()
+    with span("rank_jobs", jobs=len(job_index)):
+        try:
+            df_scored = score_jobs_for_applicant(model_version.model, job_index, args.applicant_id)
+        except KeyError as e:
+            raise SystemExit(str(e.args[0]))
+        result = rank_jobs(df_scored, job_index.job_info, args.top_n, args.min_score, args.exclude_applied)
+    print(f"{len(job_index)} vagas pontuadas em {(time.perf_counter() - started) * 1000:.1f} ms "
+          f"(apenas vagas com candidaturas na matriz; vagas sem candidaturas e o status da vaga não são considerados)")
+
+    if args.output:
+        result.to_csv(args.output, index=False, encoding="utf-8")
+        print(f"Vagas salvas em: {args.output}")
+    else:
+        print(result.to_string(index=False))
+
+
+def run_drift(args):
+    from src.services.model_registry import current_version, load_artifact
+    from src.services.monitoring import DriftSketch, REFERENCE_ARTIFACT, compare, merge_sketch_files
+
+    paths = _paths(args)
+    version = args.model_version or current_version(paths["registry"])
+    if version is None:
+        raise SystemExit("Nenhuma versão ativa no registry.")
+    reference = load_artifact(REFERENCE_ARTIFACT, version, paths["registry"])
+    if reference is None:
+        raise SystemExit(f"Versão {version} não possui sketch de referência ({REFERENCE_ARTIFACT}).")
+    current = merge_sketch_files(version, paths["monitoring"])
+    if current is None:
+        raise SystemExit(f"Nenhum sketch de tráfego encontrado para a versão {version} em {paths['monitoring']}.")
+
+    report = compare(DriftSketch.from_dict(reference), current, args.min_samples)
+    print(f"=== Drift da versão {version}: {current.sketches['score_match'].n} scores monitorados ===")
+    small = int((report["status"] == "amostra pequena").sum())
+    if small:
+        print(f"⚠️ {small} feature(s) com menos de {args.min_samples} valores observados: status 'amostra pequena'.")
+    print(report.head(args.top).to_string(index=False))
+    if args.output:
+        report.to_csv(args.output, index=False, encoding="utf-8")
+        print(f"Relatório salvo em: {args.output}")
+
+
+def build_pipeline_dag(args):
+    """
+    Pipeline completo como DAG. As dependências vêm dos artefatos declarados, então os
+    uploads para o S3 rodam em paralelo com a etapa seguinte (ex: o upload do CSV
+    pré-processado acontece durante o feature engineering). Uploads têm novas tentativas
+    e são opcionais: se falharem, o restante do pipeline continua.
+    A avaliação é dividida em duas etapas: a leitura e o one-hot do dataset rodam em
+    paralelo com o treino, e só a predição e os gráficos esperam o modelo.
+    """
+    from functools import partial
+    from src.utils.dag import Dag, Node
+
+    paths = _paths(args)
+    # Resultados passados em memória entre etapas (declarados como artefatos "memory://")
+    shared = {}
+    nodes = [
+        Node("preprocess", partial(_preprocess, args),
+             inputs=[paths["applicants"], paths["prospects"], paths["vagas"]],
+             outputs=[paths["preprocessed_csv"]]),
+        Node("features", partial(_features, args),
+             inputs=[paths["preprocessed_csv"]], outputs=[paths["feature_engineered_csv"]]),
+        Node("train", partial(run_train, args),
+             inputs=[paths["feature_engineered_csv"]],
+             outputs=[paths["model"], paths["model_columns"], paths["registry"], paths["feature_store"]]),
+        Node("load_evaluation_data", partial(_load_evaluation_data, args, shared),
+             inputs=[paths["feature_engineered_csv"]], outputs=["memory://evaluation_data"]),
+        Node("evaluate", lambda: run_evaluate(args, data=shared.pop("evaluation_data")),
+             inputs=[paths["model"], paths["model_columns"], "memory://evaluation_data"],
+             outputs=[paths["metrics"]]),
+    ]
+    if not args.no_upload:
+        nodes += [
+            Node("upload_preprocessed", partial(_upload, paths["preprocessed_csv"], "preprocessed_data.csv", True),
+                 inputs=[paths["preprocessed_csv"]], outputs=["s3://preprocessed_data.csv"],
+                 retries=args.upload_retries, optional=True),
+            Node("upload_features", partial(_upload, paths["feature_engineered_csv"], "feature_engineered_data.csv", True),
+                 inputs=[paths["feature_engineered_csv"]], outputs=["s3://feature_engineered_data.csv"],
+                 retries=args.upload_retries, optional=True),
+        ]
+    return Dag(nodes)
+
+
+def run_all(args):
+    from src.utils.dag import print_dag_report, run_dag
+
+    report = run_dag(build_pipeline_dag(args), max_workers=args.max_workers)
+    print_dag_report(report)
+    if args.dag_report:
+        os.makedirs(os.path.dirname(args.dag_report) or ".", exist_ok=True)
+        with open(args.dag_report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Relatório do DAG salvo em: {args.dag_report}")
+    # Subindo App Streamlit: executar no terminal `streamlit run src/app/app.py`
+
+
+def measure_startup(command: str, repeats: int = 3) -> dict:
+    """
+    Mede, em um processo novo, o tempo para importar a CLI e os módulos do comando.
+    Retorna o melhor tempo em segundos e as dependências pesadas que foram carregadas.
+    """
+    code = (
+        "import importlib, json, sys, time\n"
+        "t0 = time.perf_counter()\n"
+        "import src.main as cli\n"
+        f"for name in cli.COMMAND_MODULES[{command!r}]:\n"
+        "    importlib.import_module(name)\n"
+        "elapsed = time.perf_counter() - t0\n"
+        "print(json.dumps({'seconds': elapsed, 'heavy': [m for m in cli.HEAVY_MODULES if m in sys.modules]}))\n"
+    )
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT_DIR)
+        if out.returncode != 0:
+            raise RuntimeError(f"Falha ao importar os módulos do comando '{command}':\n{out.stderr.strip()}")
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    best = min(runs, key=lambda r: r["seconds"])
+    return {"command": command, "seconds": round(best["seconds"], 4), "heavy_imports": best["heavy"]}
+
+
+def run_startup_time(args):
+    commands = args.commands or list(COMMAND_MODULES)
+    unknown = [cmd for cmd in commands if cmd not in COMMAND_MODULES]
+    if unknown:
+        raise SystemExit(f"Comandos desconhecidos: {unknown}. Opções: {list(COMMAND_MODULES)}")
+    results = [measure_startup(cmd, args.repeats) for cmd in commands]
+    for r in results:
+        heavy = ", ".join(r["heavy_imports"]) or "-"
+        print(f"{r['command']:<12} {r['seconds']:.3f}s  dependências pesadas: {heavy}")
+    if args.max_seconds is not None:
+        slow = [r["command"] for r in results if r["seconds"] > args.max_seconds]
+        if slow:
+            print(f"❌ Comandos acima de {args.max_seconds}s: {slow}")
+            sys.exit(1)
+
+
+# ---------------------------
+# Parser
+# ---------------------------
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--raw-dir", default=os.path.join("src", "data", "raw"))
+    common.add_argument("--processed-dir", default=os.path.join("src", "data", "processed"))
+    common.add_argument("--models-dir", default=os.path.join("src", "models"))
+    common.add_argument("--metrics-dir", default=os.path.join("src", "reports", "metrics"))
+    common.add_argument("--monitoring-dir", default=os.path.join("src", "reports", "monitoring"))
+    common.add_argument("--no-upload", action="store_true", help="Não envia os CSVs para o S3")
+    common.add_argument("--instrument", action="store_true",
+                        help="Habilita a instrumentação por etapa (também via PIPELINE_INSTRUMENTATION=1)")
+    common.add_argument("--profile-stage", default=os.getenv("PIPELINE_PROFILE_STAGE"),
+                        help="Etapa que terá um dump do cProfile salvo")
+
+    parser = argparse.ArgumentParser(prog="python -m src.main", description="Pipeline de matching vaga-candidato")
+    sub = parser.add_subparsers(dest="command")
+
+    training = argparse.ArgumentParser(add_help=False)
+    training.add_argument("--neg-sample-rate", type=float, default=1.0,
+                          help="Fração dos negativos usada na busca do Optuna, estratificada por vaga (padrão: 1.0)")
+    training.add_argument("--refit-full", action="store_true",
+                          help="Treina o modelo final com todos os dados após a busca subamostrada")
+    training.add_argument("--compare-downsampling", action="store_true",
+                          help="Compara AUC e tempo entre treino completo e subamostrado antes do treino final")
+
+    run_all_parser = sub.add_parser("all", parents=[common, training],
+                                    help="Executa o pipeline completo (etapas independentes em paralelo)")
+    run_all_parser.add_argument("--max-workers", type=int, default=None,
+                                help="Número máximo de etapas executadas ao mesmo tempo")
+    run_all_parser.add_argument("--upload-retries", type=int, default=2,
+                                help="Novas tentativas para cada upload ao S3 (padrão: 2)")
+    run_all_parser.add_argument("--dag-report", default=None,
+                                help="JSON com os tempos de cada etapa e o caminho crítico")
+    run_all_parser.set_defaults(func=run_all)
+    sub.add_parser("preprocess", parents=[common], help="Pré-processa os JSONs brutos").set_defaults(func=run_preprocess)
+    sub.add_parser("features", parents=[common], help="Gera as features").set_defaults(func=run_features)
+    sub.add_parser("train", parents=[common, training], help="Treina o modelo").set_defaults(func=run_train)
+    sub.add_parser("evaluate", parents=[common], help="Avalia o modelo").set_defaults(func=run_evaluate)
+
+    build_store = sub.add_parser("build-store", parents=[common],
+                                 help="Gera a matriz de features memory-mapped para o modelo ativo")
+    build_store.add_argument("--model-version", default=None, help="Versão do registry (padrão: versão ativa)")
+    build_store.set_defaults(func=run_build_store)
+
+    export_native = sub.add_parser("export-native", parents=[common],
+                                   help="Exporta o booster no formato nativo do LightGBM (bundle versionado)")
+    export_native.add_argument("--model-version", default=None, help="Versão do registry (padrão: versão ativa)")
+    export_native.add_argument("--prune", action="store_true",
+                               help="Bundle podado em native_pruned/ (iteração e threshold escolhidos em metades "
+                                    "separadas da validação); não altera o bundle completo")
+    export_native.set_defaults(func=run_export_native)
+
+    score = sub.add_parser("score", parents=[common], help="Calcula o score dos candidatos de uma vaga")
+    score.add_argument("--job-id", default=None, help="Vaga a ser pontuada (todas se omitido)")
+    score.add_argument("--top-n", type=int, default=None)
+    score.add_argument("--min-score", type=float, default=0.0)
+    score.add_argument("--output", default=None, help="CSV de saída (imprime na tela se omitido)")
+    score.add_argument("--model-version", default=None, help="Versão do registry (padrão: versão ativa)")
+    score.add_argument("--explain", type=int, nargs="?", const=3, default=0, metavar="K",
+                       help="Inclui as K features que mais contribuíram para cada score (padrão K=3)")
+    score.add_argument("--native", action="store_true",
+                       help="Usa o bundle nativo do LightGBM (gerado no treino ou por export-native)")
+    score.add_argument("--pruned", action="store_true",
+                       help="Com --native, usa o bundle podado (export-native --prune)")
+    score.add_argument("--monitor", action="store_true",
+                       help="Atualiza os sketches de drift com as features e scores calculados")
+    score.set_defaults(func=run_score)
+
+    rank_jobs = sub.add_parser("rank-jobs", parents=[common], help="Ordena as vagas para um candidato")
+    rank_jobs.add_argument("--applicant-id", required=True, help="Código do candidato")
+    rank_jobs.add_argument("--top-n", type=int, default=10)
+    rank_jobs.add_argument("--min-score", type=float, default=0.0)
+    rank_jobs.add_argument("--exclude-applied", action="store_true",
+                           help="Remove as vagas em que o candidato já se candidatou")
+    rank_jobs.add_argument("--output", default=None, help="CSV de saída (imprime na tela se omitido)")
+    rank_jobs.add_argument("--model-version", default=None, help="Versão do registry (padrão: versão ativa)")
+    rank_jobs.set_defaults(func=run_rank_jobs)
+
+    drift = sub.add_parser("drift", parents=[common], help="Compara o tráfego monitorado com a referência do treino")
+    drift.add_argument("--model-version", default=None, help="Versão do registry (padrão: versão ativa)")
+    drift.add_argument("--top", type=int, default=20, help="Número de features exibidas")
+    drift.add_argument("--min-samples", type=int, default=100,
+                       help="Mínimo de valores observados para classificar o drift de uma feature")
+    drift.add_argument("--output", default=None, help="CSV com o relatório completo")
+    drift.set_defaults(func=run_drift)
+
+    startup = sub.add_parser("startup-time", help="Mede o tempo de import de cada comando")
+    startup.add_argument("commands", nargs="*", metavar="COMANDO",
+                         help=f"Comandos a medir (padrão: {', '.join(COMMAND_MODULES)})")
+    startup.add_argument("--repeats", type=int, default=3)
+    startup.add_argument("--max-seconds", type=float, default=None,
+                         help="Falha (exit 1) se algum comando ultrapassar esse tempo")
+    startup.set_defaults(func=run_startup_time)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # Sem subcomando (ex: `python -m src.main --no-upload`) executa o pipeline completo
+    if not argv or argv[0] not in SUBCOMMANDS + ("-h", "--help"):
+        argv = ["all"] + argv
+    args = parser.parse_args(argv)
+
+    # Instrumentação opcional (desabilitada por padrão)
+    if getattr(args, "instrument", False) or os.getenv("PIPELINE_INSTRUMENTATION") == "1":
+        instrumentation.configure(
+            enabled=True,
+            profile_stage=getattr(args, "profile_stage", None),
+            trace_memory=os.getenv("PIPELINE_TRACE_MEMORY", "1") == "1",
+        )
 
-    # ---------------------------
-    # 5) Subindo App Streamlit
-    # ---------------------------
-    #Executar no terminal streamlit run src/app/app.py
+    started = time.perf_counter()
+    try:
+        args.func(args)
+    finally:
+        instrumentation.write_report()
+    if args.func is run_all:
+        print(f"\nPipeline concluído em {time.perf_counter() - started:.1f}s")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -5,11 +5,17 @@ import joblib
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import roc_auc_score, f1_score, accuracy_score, classification_report, confusion_matrix, roc_curve, precision_recall_curve
+import matplotlib
+# Backend sem interface gráfica: os gráficos são apenas salvos em arquivo, e no DAG
+# do pipeline esta etapa roda em uma thread de trabalho (fora da thread principal)
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 
-from src.utils.utils import load_model, load_dataset, prepare_data_for_prediction
+from src.utils.utils import load_model, load_dataset, prepare_data_for_prediction, MODEL_PATH, MODEL_COLUMNS_PATH, PROCESSED_DATA_PATH
+from src.utils.instrumentation import span
+from src.services.feature_store import open_if_compatible, FEATURE_STORE_DIR
 
 TARGET_COL = "target"
 METRICS_PATH = "src/reports/metrics"
@@ -20,32 +26,60 @@ def find_optimal_threshold(y_true, y_pred_proba):
     best_idx = np.argmax(f1_scores)
     return thresholds[best_idx]
 
-def pipeline_evaluate():
+def load_evaluation_data(data_path=PROCESSED_DATA_PATH):
+    """
+    Lê o dataset com features e aplica o one-hot encoding (a parte cara do alinhamento).
+    Não depende do modelo, então pode rodar em paralelo com o treino; o `reindex`
+    para as colunas do modelo é feito em `pipeline_evaluate`.
+    Retorna (X com dummies, y).
+    """
+    with span("load_evaluation_data") as s:
+        df = load_dataset(data_path)
+        X = df.drop(columns=[TARGET_COL], errors='ignore')
+        y = df[TARGET_COL]
+        X_dummies = pd.get_dummies(X, dummy_na=True)
+        s.set(rows=len(df), columns=X_dummies.shape[1])
+    return X_dummies, y
+
+def pipeline_evaluate(model_path=MODEL_PATH, data_path=PROCESSED_DATA_PATH,
+                      columns_path=MODEL_COLUMNS_PATH, metrics_path=METRICS_PATH,
+                      feature_store_dir=FEATURE_STORE_DIR, data=None):
     """
     Carrega o modelo, avalia e salva um relatório completo com múltiplas métricas e gráficos.
+    data: resultado de `load_evaluation_data`, se já carregado (ex: em paralelo com o treino).
     """
     print("=== Iniciando Avaliação do Modelo ===")
-    os.makedirs(METRICS_PATH, exist_ok=True)
+    os.makedirs(metrics_path, exist_ok=True)
     
-    # Carregar modelo, dados e colunas
-    model = load_model()
-    df = load_dataset()
+    # Carregar modelo e colunas
+    model = load_model(model_path)
     try:
-        model_columns = joblib.load('src/models/model_columns.pkl')
+        model_columns = joblib.load(columns_path)
     except FileNotFoundError:
         print("❌ Erro: 'model_columns.pkl' não encontrado. Execute o treino primeiro.")
         return
 
-    # Alinhar dados
-    X = df.drop(columns=[TARGET_COL], errors='ignore')
-    y = df[TARGET_COL]
-    X_aligned = pd.get_dummies(X, dummy_na=True).reindex(columns=model_columns, fill_value=0)
+    # Dados alinhados: matriz do feature store (sem parse) ou CSV + get_dummies
+    store = open_if_compatible(feature_store_dir, model_columns) if feature_store_dir and data is None else None
+    if data is not None:
+        X_dummies, y = data
+        X_aligned = X_dummies.reindex(columns=model_columns, fill_value=0)
+    elif store is not None:
+        print(f"Usando matriz de features de: {feature_store_dir}")
+        # Restaura a ordem original das linhas para reproduzir o split do treino
+        original = store.original_order()
+        X_aligned = pd.DataFrame(store.X[original], columns=model_columns)
+        y = pd.Series(store.y[original], name=TARGET_COL)
+    else:
+        X_dummies, y = load_evaluation_data(data_path)
+        X_aligned = X_dummies.reindex(columns=model_columns, fill_value=0)
     
     # Split
     _, X_test, _, y_test = train_test_split(X_aligned, y, test_size=0.2, random_state=42, stratify=y)
     
     # Predições
-    y_pred_proba = model.predict_proba(X_test)[:, 1]
+    with span("predict", rows=len(X_test)):
+        y_pred_proba = model.predict_proba(X_test)[:, 1]
     threshold = find_optimal_threshold(y_test, y_pred_proba)
     y_pred = (y_pred_proba > threshold).astype(int)
     
@@ -66,7 +100,7 @@ def pipeline_evaluate():
     plt.title('Matriz de Confusão')
     plt.ylabel('Verdadeiro')
     plt.xlabel('Predito')
-    plt.savefig(os.path.join(METRICS_PATH, 'confusion_matrix.png'))
+    plt.savefig(os.path.join(metrics_path, 'confusion_matrix.png'))
     plt.close()
 
     # 2. Curva ROC
@@ -78,7 +112,7 @@ def pipeline_evaluate():
     plt.ylabel('Taxa de Verdadeiros Positivos')
     plt.title('Curva ROC (Receiver Operating Characteristic)')
     plt.legend(loc='lower right')
-    plt.savefig(os.path.join(METRICS_PATH, 'roc_curve.png'))
+    plt.savefig(os.path.join(metrics_path, 'roc_curve.png'))
     plt.close()
 
     # 3. Curva de Precisão-Recall
@@ -89,7 +123,7 @@ def pipeline_evaluate():
     plt.ylabel('Precisão')
     plt.title('Curva de Precisão-Recall')
     plt.grid(True)
-    plt.savefig(os.path.join(METRICS_PATH, 'precision_recall_curve.png'))
+    plt.savefig(os.path.join(metrics_path, 'precision_recall_curve.png'))
     plt.close()
 
     # 4. Histograma de Distribuição de Probabilidades
@@ -100,10 +134,10 @@ def pipeline_evaluate():
     plt.title('Distribuição das Probabilidades do Modelo')
     plt.xlabel('Probabilidade (Score de Match)')
     plt.legend()
-    plt.savefig(os.path.join(METRICS_PATH, 'probability_distribution.png'))
+    plt.savefig(os.path.join(metrics_path, 'probability_distribution.png'))
     plt.close()
 
-    print(f"Gráficos salvos em: {METRICS_PATH}")
+    print(f"Gráficos salvos em: {metrics_path}")
     print("\n=== Avaliação Concluída ===")
     
 if __name__ == "__main__":
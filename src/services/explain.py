@@ -0,0 +1,136 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from src.services.scoring import normalize_ids, prepare_data_for_prediction, TARGET_COL
+
+# Nomes legíveis para as features mais comuns (as demais aparecem com o nome da coluna)
+FEATURE_LABELS = {
+    "match_nivel_profissional": "Nível profissional compatível",
+    "match_cidade": "Mesma cidade da vaga",
+    "cv_experience_years": "Anos de experiência",
+    "cv_total_skills": "Total de skills",
+    "cv_word_count": "Tamanho do CV (palavras)",
+    "cv_char_count": "Tamanho do CV (caracteres)",
+    "cv_english_level": "Nível de inglês",
+    "cv_has_content": "CV preenchido",
+    "cv_complexity": "Complexidade do CV",
+    "experience_bin": "Faixa de experiência",
+    "skills_bin": "Faixa de skills",
+    "idade": "Idade",
+}
+
+
+def group_columns(model_columns, source_columns):
+    """
+    Mapeia cada coluna do modelo para a feature de origem.
+    Colunas one-hot geradas por `pd.get_dummies` ("<coluna>_<valor>") são agrupadas na
+    categórica original (o prefixo mais longo entre as colunas de origem).
+    Retorna (nomes_dos_grupos, matriz indicadora n_colunas x n_grupos).
+    """
+    source_set = set(source_columns)
+    source = sorted(source_set, key=len, reverse=True)
+    groups, group_of = [], []
+    positions = {}
+    for col in model_columns:
+        if col in source_set:
+            name = col
+        else:
+            name = next((s for s in source if col.startswith(f"{s}_")), col)
+        if name not in positions:
+            positions[name] = len(groups)
+            groups.append(name)
+        group_of.append(positions[name])
+
+    indicator = np.zeros((len(model_columns), len(groups)), dtype=np.float64)
+    indicator[np.arange(len(model_columns)), group_of] = 1.0
+    return groups, indicator
+
+
+def feature_contributions(model, X_prepared: pd.DataFrame, source_columns) -> pd.DataFrame:
+    """
+    Calcula as contribuições (SHAP nativo do LightGBM, em log-odds) de todos os candidatos
+    em uma única chamada e soma as colunas one-hot na feature de origem.
+    A coluna '_base' contém o valor esperado do modelo.
+    """
+    contrib = np.asarray(model.predict(X_prepared, pred_contrib=True))
+    groups, indicator = group_columns(list(X_prepared.columns), source_columns)
+    grouped = contrib[:, :-1] @ indicator
+    result = pd.DataFrame(grouped, columns=groups, index=X_prepared.index)
+    result["_base"] = contrib[:, -1]
+    return result
+
+
+def top_drivers(contributions: pd.DataFrame, k: int = 3) -> list:
+    """Retorna, para cada linha, um texto com as k features de maior impacto absoluto."""
+    features = contributions.drop(columns=["_base"], errors="ignore")
+    values = features.to_numpy()
+    if values.shape[1] == 0:
+        return [""] * len(features)
+    k = min(k, values.shape[1])
+    order = np.argsort(-np.abs(values), axis=1)[:, :k]
+    names = np.array([FEATURE_LABELS.get(c, c) for c in features.columns])
+    drivers = []
+    for row, idx in zip(values, order):
+        drivers.append("; ".join(f"{names[i]} ({row[i]:+.2f})" for i in idx if row[i] != 0))
+    return drivers
+
+
+class ExplanationCache:
+    """Cache LRU das explicações por (versão do modelo, vaga), seguro para múltiplas threads."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def explain_job(model_version, df_job: pd.DataFrame, job_id=None, k: int = 3,
+                cache: ExplanationCache = None, store=None) -> pd.DataFrame:
+    """
+    Explica os scores de todos os candidatos de uma vaga.
+    Retorna um DataFrame com 'applicant_id' e 'principais_fatores' (top-k features).
+    O resultado é cacheado por (versão do modelo, vaga, k) quando `cache` é informado.
+    store: FeatureMatrix opcional; quando informado, as features da vaga vêm da matriz já alinhada.
+    """
+    key = (model_version.version, job_id, k)
+    if cache is not None and job_id is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    if store is not None:
+        rows = store.job_slice(job_id) if job_id is not None else slice(None)
+        X_prepared = store.frame(rows)
+        source_columns = store.metadata["source_columns"]
+        applicant_ids = store.applicant_id[rows]
+    else:
+        X_job = df_job.drop(columns=[TARGET_COL, "score_match"], errors="ignore")
+        X_prepared = prepare_data_for_prediction(X_job, model_version.model_columns)
+        source_columns = X_job.columns
+        applicant_ids = df_job["applicant_id"].to_numpy()
+    contributions = feature_contributions(model_version.model, X_prepared, source_columns)
+    result = pd.DataFrame({
+        "applicant_id": normalize_ids(applicant_ids),
+        "principais_fatores": top_drivers(contributions, k),
+    })
+
+    if cache is not None and job_id is not None:
+        cache.put(key, result)
+    return result
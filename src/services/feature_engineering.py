@@ -1,6 +1,11 @@
 import pandas as pd
 import numpy as np
-from category_encoders import TargetEncoder
+from src.utils.instrumentation import span
+
+PREPROCESSED_DATA_PATH = "src/data/processed/preprocessed_data.csv"
+FEATURE_ENGINEERED_DATA_PATH = "src/data/processed/feature_engineered_data.csv"
+# Níveis profissionais em ordem, para comparar o nível do candidato com o da vaga
+LEVEL_MAP = {'Júnior': 1, 'Pleno': 2, 'Sênior': 3, 'Especialista': 4}
 
 def feature_engineering(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -16,9 +21,8 @@ def feature_engineering(df: pd.DataFrame) -> pd.DataFrame:
     # Match de Nível Profissional (ex: Pleno vs Sênior)
     if 'perfil_vaga_nivel_profissional' in df.columns and 'informacoes_profissionais_nivel_profissional' in df.columns:
         # Mapear para valores numéricos para comparação
-        level_map = {'Júnior': 1, 'Pleno': 2, 'Sênior': 3, 'Especialista': 4}
-        vaga_level = df['perfil_vaga_nivel_profissional'].map(level_map)
-        cand_level = df['informacoes_profissionais_nivel_profissional'].map(level_map)
+        vaga_level = df['perfil_vaga_nivel_profissional'].map(LEVEL_MAP)
+        cand_level = df['informacoes_profissionais_nivel_profissional'].map(LEVEL_MAP)
         # Feature: 1 se o nível do candidato for igual ou superior ao da vaga, 0 caso contrário
         df['match_nivel_profissional'] = (cand_level >= vaga_level).astype(int)
 
@@ -54,6 +58,8 @@ def feature_engineering(df: pd.DataFrame) -> pd.DataFrame:
             high_cardinality_cols.append(col)
             
     if high_cardinality_cols and 'target' in df.columns:
+        # Importado aqui para que LEVEL_MAP possa ser usado no scoring sem carregar o category_encoders
+        from category_encoders import TargetEncoder
         print(f"Colunas para Target Encoding: {high_cardinality_cols}")
         # O TargetEncoder precisa do 'y' (alvo) para o cálculo
         # É importante fazer isso ANTES do split de treino/teste para evitar data leakage
@@ -65,7 +71,9 @@ def feature_engineering(df: pd.DataFrame) -> pd.DataFrame:
         X = df.drop(columns=['target'])
         
         # Aplicar o encoding
-        X_encoded = encoder.fit_transform(X, y)
+        with span("target_encoding") as s:
+            X_encoded = encoder.fit_transform(X, y)
+            s.set(rows=len(X), columns=len(high_cardinality_cols))
         
         # Juntar novamente
         df = pd.concat([X_encoded, y], axis=1)
@@ -73,18 +81,18 @@ def feature_engineering(df: pd.DataFrame) -> pd.DataFrame:
     print("Engenharia de features concluída.")
     return df
 
-def pipeline_feature_engineering():
+def pipeline_feature_engineering(input_path=PREPROCESSED_DATA_PATH, output_path=FEATURE_ENGINEERED_DATA_PATH):
     print('--- Iniciando Pipeline de Engenharia de Features ---')
     # Ler do 'preprocessed_data.csv'
-    df = pd.read_csv("src/data/processed/preprocessed_data.csv", parse_dates=True)
+    df = pd.read_csv(input_path, parse_dates=True)
     
     # O Target Encoder precisa da coluna 'target', então garantimos que ela está lá
     if 'target' not in df.columns:
         raise ValueError("A coluna 'target' é necessária para o Target Encoding e não foi encontrada.")
         
     df_featured = feature_engineering(df)
-    df_featured.to_csv("src/data/processed/feature_engineered_data.csv", index=False, encoding="utf-8")
-    print("\nCSV com novas features salvo em src/data/processed/feature_engineered_data.csv")
+    df_featured.to_csv(output_path, index=False, encoding="utf-8")
+    print(f"\nCSV com novas features salvo em {output_path}")
     print('--- Pipeline de Engenharia de Features Concluído ---')
 
 if __name__ == "__main__":
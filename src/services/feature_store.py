@@ -0,0 +1,153 @@
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.services.scoring import normalize_ids, prepare_data_for_prediction, TARGET_COL
+
+# --- Constantes ---
+FEATURE_STORE_DIR = "src/data/processed/feature_store"
+# 2: chaves normalizadas com `normalize_ids` ("382", não "382.0"; ausentes como "")
+FORMAT_VERSION = 2
+METADATA_FILE = "metadata.json"
+CHUNK_ROWS = 50_000
+
+
+@dataclass
+class FeatureMatrix:
+    """
+    Matriz de features pronta para o modelo, aberta via memory-map (somente leitura).
+    As linhas estão ordenadas por job_id; `job_offsets` dá o intervalo de cada vaga,
+    então os candidatos de uma vaga são uma fatia contígua (sem cópia) de X.
+    Vários processos que abrem o mesmo diretório compartilham as mesmas páginas físicas.
+    """
+    X: np.ndarray
+    y: np.ndarray
+    job_id: np.ndarray
+    applicant_id: np.ndarray
+    row_order: np.ndarray
+    columns: list
+    metadata: dict
+
+    def __len__(self):
+        return self.X.shape[0]
+
+    def job_slice(self, job_id) -> slice:
+        start, stop = self.metadata["job_offsets"].get(normalize_ids([job_id])[0], (0, 0))
+        return slice(start, stop)
+
+    def frame(self, rows=slice(None)) -> pd.DataFrame:
+        """DataFrame com as colunas do modelo sobre a fatia pedida (sem copiar os dados)."""
+        return pd.DataFrame(self.X[rows], columns=self.columns, copy=False)
+
+    def original_order(self):
+        """Índices que restauram a ordem original do CSV (ex: para reproduzir o split do treino)."""
+        return np.argsort(self.row_order, kind="stable")
+
+
+def write_feature_matrix(df: pd.DataFrame, model_columns, out_dir: str = FEATURE_STORE_DIR,
+                         model_version: Optional[str] = None) -> dict:
+    """
+    Gera a matriz final alinhada às colunas do modelo (float32), os labels e as chaves
+    (job_id, applicant_id) a partir do dataset com features e grava como arrays .npy
+    prontos para memory-map, mais um metadata.json.
+    As chaves passam por `normalize_ids`; linhas sem chave ficam na matriz (o split do treino
+    é reproduzido pela ordem original), mas com chave "" e fora de `job_offsets`.
+    A gravação é feita em um diretório temporário que substitui o anterior ao final.
+    """
+    n_rows = len(df)
+    job_ids = normalize_ids(df["job_id"])
+    applicant_col = "applicant_id" if "applicant_id" in df.columns else "codigo"
+    applicant_ids = normalize_ids(df[applicant_col])
+    order = np.argsort(job_ids, kind="stable")
+    sorted_jobs = job_ids[order]
+
+    tmp_dir = f"{out_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    source = df.drop(columns=[TARGET_COL], errors="ignore")
+    X = np.lib.format.open_memmap(os.path.join(tmp_dir, "X.npy"), mode="w+",
+                                  dtype=np.float32, shape=(n_rows, len(model_columns)))
+    # Alinhamento em blocos para limitar a memória usada pelo get_dummies
+    for start in range(0, n_rows, CHUNK_ROWS):
+        idx = order[start:start + CHUNK_ROWS]
+        chunk = prepare_data_for_prediction(source.iloc[idx], model_columns)
+        X[start:start + len(idx)] = chunk.to_numpy(dtype=np.float32, na_value=np.nan)
+    X.flush()
+    del X
+
+    y = df[TARGET_COL].to_numpy(dtype=np.int8)[order] if TARGET_COL in df.columns else np.zeros(n_rows, dtype=np.int8)
+    np.save(os.path.join(tmp_dir, "y.npy"), y)
+    np.save(os.path.join(tmp_dir, "job_id.npy"), sorted_jobs.astype(str))
+    np.save(os.path.join(tmp_dir, "applicant_id.npy"), applicant_ids[order].astype(str))
+    np.save(os.path.join(tmp_dir, "row_order.npy"), order.astype(np.int64))
+
+    unique_jobs, starts = np.unique(sorted_jobs, return_index=True)
+    stops = np.append(starts[1:], n_rows)
+    metadata = {
+        "format_version": FORMAT_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "model_version": model_version,
+        "n_rows": int(n_rows),
+        "dtype": "float32",
+        "columns": list(model_columns),
+        "source_columns": list(source.columns),
+        "job_offsets": {job: [int(a), int(b)] for job, a, b in zip(unique_jobs, starts, stops) if job},
+    }
+    with open(os.path.join(tmp_dir, METADATA_FILE), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False)
+
+    # Troca o diretório. Processos com a versão anterior aberta continuam lendo
+    # os arquivos antigos (o memory-map mantém os inodes válidos até ser fechado).
+    old_dir = f"{out_dir}.old-{os.getpid()}"
+    if os.path.exists(out_dir):
+        os.rename(out_dir, old_dir)
+    os.rename(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    print(f"✅ Matriz de features ({n_rows} x {len(model_columns)}, float32) salva em {out_dir}")
+    return metadata
+
+
+def open_feature_matrix(path: str = FEATURE_STORE_DIR) -> FeatureMatrix:
+    """Abre a matriz via memory-map: tempo de parse zero e memória sob demanda."""
+    with open(os.path.join(path, METADATA_FILE), "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+    if metadata.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Formato da matriz não suportado: {metadata.get('format_version')}")
+    return FeatureMatrix(
+        X=np.load(os.path.join(path, "X.npy"), mmap_mode="r"),
+        y=np.load(os.path.join(path, "y.npy"), mmap_mode="r"),
+        job_id=np.load(os.path.join(path, "job_id.npy"), mmap_mode="r"),
+        applicant_id=np.load(os.path.join(path, "applicant_id.npy"), mmap_mode="r"),
+        row_order=np.load(os.path.join(path, "row_order.npy"), mmap_mode="r"),
+        columns=metadata["columns"],
+        metadata=metadata,
+    )
+
+
+def open_if_current(path: str = FEATURE_STORE_DIR) -> Optional[FeatureMatrix]:
+    """Abre a matriz, ou None se ela não existir ou for de um formato anterior."""
+    if not os.path.exists(os.path.join(path, METADATA_FILE)):
+        return None
+    try:
+        return open_feature_matrix(path)
+    except ValueError as e:
+        print(f"⚠️ {e} em {path}; gere a matriz de novo com `python -m src.main build-store`.")
+        return None
+
+
+def open_if_compatible(path: str, model_columns) -> Optional[FeatureMatrix]:
+    """Abre a matriz somente se ela existir e estiver alinhada às colunas do modelo."""
+    store = open_if_current(path)
+    if store is None:
+        return None
+    if store.columns != list(model_columns):
+        print(f"⚠️ Matriz em {path} não corresponde às colunas do modelo; usando o CSV.")
+        return None
+    return store
@@ -0,0 +1,153 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.services.explain import group_columns
+from src.services.feature_engineering import LEVEL_MAP
+from src.services.scoring import normalize_ids
+
+# Colunas de origem que descrevem a vaga (as demais descrevem o candidato)
+JOB_COLUMN_PREFIXES = ("informacoes_basicas_", "perfil_vaga_", "beneficios_")
+JOB_COLUMNS = {"job_id", "titulo_vaga", "modalidade_vaga"}
+# Features que dependem da vaga e do candidato (recalculadas para cada par)
+INTERACTION_COLUMNS = ("match_nivel_profissional", "match_cidade")
+JOB_DISPLAY_COLUMNS = ['job_id', 'titulo_vaga', 'modalidade_vaga', 'perfil_vaga_cidade', 'perfil_vaga_nivel_profissional']
+
+
+def is_job_column(source_column: str) -> bool:
+    return source_column in JOB_COLUMNS or source_column.startswith(JOB_COLUMN_PREFIXES)
+
+
+def _levels(values) -> np.ndarray:
+    return pd.Series(values).map(LEVEL_MAP).to_numpy(dtype=np.float64)
+
+
+def _cities(values) -> np.ndarray:
+    # Valores ausentes continuam NaN (e nunca são iguais entre si), como no feature_engineering
+    return pd.Series(values, dtype=object).str.lower().to_numpy()
+
+
+@dataclass
+class JobIndex:
+    """
+    Blocos de features por vaga, pré-calculados a partir da matriz do feature store.
+    `job_block` tem uma linha por vaga com as colunas da vaga preenchidas (as colunas do
+    candidato são preenchidas na hora, por broadcast). Junto ficam os dados brutos usados
+    nas features de interação (nível e cidade da vaga) e os dados legíveis para exibição.
+    O universo de vagas é o da matriz: só entram vagas com ao menos uma candidatura. Vagas sem
+    candidaturas (em geral as recém-abertas) não têm linha com as features da vaga (o Target
+    Encoding do feature engineering não é persistido), e o status da vaga não é filtrado.
+    """
+    store: object
+    job_id: np.ndarray
+    job_block: np.ndarray
+    job_mask: np.ndarray
+    job_level: np.ndarray
+    job_city: np.ndarray
+    interaction_idx: dict
+    job_info: pd.DataFrame
+    applicant_info: pd.DataFrame
+
+    @classmethod
+    def build(cls, store, df_processed: pd.DataFrame) -> "JobIndex":
+        """
+        Monta o índice a partir da matriz (já alinhada às colunas do modelo) e do CSV
+        pré-processado. As colunas da vaga são iguais em todas as linhas de uma vaga,
+        então basta a primeira linha de cada fatia.
+        """
+        columns = list(store.columns)
+        groups, indicator = group_columns(columns, store.metadata["source_columns"])
+        source_of = np.array(groups)[indicator.argmax(axis=1)]
+        job_mask = np.array([is_job_column(s) for s in source_of])
+        interaction_idx = {c: columns.index(c) for c in INTERACTION_COLUMNS if c in columns}
+
+        offsets = store.metadata["job_offsets"]
+        job_id = np.array(list(offsets), dtype=str)
+        starts = np.array([start for start, _ in offsets.values()], dtype=np.int64)
+        job_block = np.zeros((len(job_id), len(columns)), dtype=np.float32)
+        job_block[:, job_mask] = np.asarray(store.X[starts])[:, job_mask]
+
+        jobs = df_processed.assign(job_id=normalize_ids(df_processed['job_id']))
+        jobs = jobs.drop_duplicates(subset=['job_id']).set_index('job_id')
+        jobs = jobs.reindex(job_id)
+        job_info = jobs[[c for c in JOB_DISPLAY_COLUMNS[1:] if c in jobs.columns]].reset_index()
+
+        applicant_cols = [c for c in ('informacoes_profissionais_nivel_profissional', 'informacoes_pessoais_local', 'nome')
+                          if c in df_processed.columns]
+        applicants = df_processed.assign(applicant_id=normalize_ids(df_processed['applicant_id']))
+        applicant_info = (applicants[applicants['applicant_id'] != ""].drop_duplicates(subset=['applicant_id'])
+                          .set_index('applicant_id')[applicant_cols])
+
+        return cls(
+            store=store,
+            job_id=job_id,
+            job_block=job_block,
+            job_mask=job_mask,
+            job_level=_levels(jobs.get('perfil_vaga_nivel_profissional', pd.Series(np.nan, index=jobs.index))),
+            job_city=_cities(jobs.get('perfil_vaga_cidade', pd.Series(np.nan, index=jobs.index))),
+            interaction_idx=interaction_idx,
+            job_info=job_info,
+            applicant_info=applicant_info,
+        )
+
+    def __len__(self):
+        return len(self.job_id)
+
+    def applicant_rows(self, applicant_id) -> np.ndarray:
+        """Linhas da matriz com as candidaturas existentes do candidato."""
+        key = normalize_ids([applicant_id])[0]
+        if not key:
+            return np.array([], dtype=np.int64)
+        return np.flatnonzero(self.store.applicant_id == key)
+
+    def candidate_batch(self, applicant_id, rows: np.ndarray = None) -> pd.DataFrame:
+        """
+        Matriz (vagas x colunas do modelo) do candidato contra todas as vagas: as colunas do
+        candidato vêm de uma candidatura existente e são replicadas por broadcast, e as
+        features de interação são recalculadas para cada vaga com as mesmas regras do
+        `feature_engineering`.
+        rows: resultado de `applicant_rows`, se já calculado.
+        """
+        rows = self.applicant_rows(applicant_id) if rows is None else rows
+        if rows.size == 0:
+            raise KeyError(f"Candidato {applicant_id} não encontrado na matriz de features")
+        candidate = np.asarray(self.store.X[rows[0]])
+        X = np.where(self.job_mask, self.job_block, candidate)
+
+        key = normalize_ids([applicant_id])[0]
+        info = self.applicant_info.loc[key] if key in self.applicant_info.index else {}
+        if "match_nivel_profissional" in self.interaction_idx:
+            level = _levels([info.get('informacoes_profissionais_nivel_profissional')])[0]
+            X[:, self.interaction_idx["match_nivel_profissional"]] = level >= self.job_level
+        if "match_cidade" in self.interaction_idx:
+            location = pd.Series([info.get('informacoes_pessoais_local')], dtype=object)
+            city = _cities(location.str.split(',').str[0])[0]
+            X[:, self.interaction_idx["match_cidade"]] = self.job_city == city
+        return pd.DataFrame(X, columns=self.store.columns, copy=False)
+
+
+def score_jobs_for_applicant(model, job_index: JobIndex, applicant_id) -> pd.DataFrame:
+    """
+    Calcula o score de match de um candidato contra todas as vagas em uma única chamada
+    de `predict_proba`. Retorna 'job_id', 'score_match' e 'candidatura_existente'.
+    """
+    rows = job_index.applicant_rows(applicant_id)
+    X = job_index.candidate_batch(applicant_id, rows)
+    applied = np.unique(job_index.store.job_id[rows])
+    return pd.DataFrame({
+        'job_id': job_index.job_id,
+        'score_match': model.predict_proba(X)[:, 1],
+        'candidatura_existente': np.isin(job_index.job_id, applied),
+    })
+
+
+def rank_jobs(df_scored: pd.DataFrame, job_info: pd.DataFrame, top_n: int = None,
+              min_score: float = 0.0, exclude_applied: bool = False) -> pd.DataFrame:
+    """Junta os scores com os dados legíveis das vagas e ordena do maior para o menor."""
+    ranked = df_scored[df_scored['score_match'] >= min_score]
+    if exclude_applied:
+        ranked = ranked[~ranked['candidatura_existente']]
+    ranked = ranked.sort_values(by='score_match', ascending=False)
+    ranked = ranked.head(top_n) if top_n else ranked
+    return ranked.merge(job_info, on='job_id', how='left')
@@ -0,0 +1,214 @@
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional
+
+import joblib
+
+# --- Constantes ---
+REGISTRY_DIR = "src/models/registry"
+MODEL_PATH = "src/models/model.pkl"
+MODEL_COLUMNS_PATH = "src/models/model_columns.pkl"
+CURRENT_FILE = "CURRENT"
+MODEL_FILE = "model.pkl"
+COLUMNS_FILE = "model_columns.pkl"
+METADATA_FILE = "metadata.json"
+_VERSION_RE = re.compile(r"^v(\d+)$")
+
+
+@dataclass(frozen=True)
+class ModelVersion:
+    """Versão imutável do modelo: modelo, lista de colunas e metadados."""
+    version: str
+    model: Any
+    model_columns: list
+    metadata: dict = field(default_factory=dict)
+
+
+def list_versions(registry_dir: str = REGISTRY_DIR) -> list:
+    """Lista as versões publicadas, da mais antiga para a mais nova."""
+    if not os.path.isdir(registry_dir):
+        return []
+    versions = [d for d in os.listdir(registry_dir)
+                if _VERSION_RE.match(d) and os.path.isdir(os.path.join(registry_dir, d))]
+    return sorted(versions, key=lambda v: int(_VERSION_RE.match(v).group(1)))
+
+
+def current_version(registry_dir: str = REGISTRY_DIR) -> Optional[str]:
+    """Retorna a versão ativa apontada pelo arquivo CURRENT (ou None se o registry estiver vazio)."""
+    try:
+        with open(os.path.join(registry_dir, CURRENT_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _write_atomic(path: str, content: str):
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def set_current(version: str, registry_dir: str = REGISTRY_DIR):
+    """Aponta o registry para uma versão existente (útil para rollback)."""
+    if not os.path.isdir(os.path.join(registry_dir, version)):
+        raise ValueError(f"Versão {version} não encontrada em {registry_dir}")
+    _write_atomic(os.path.join(registry_dir, CURRENT_FILE), version)
+
+
+def publish_version(model, model_columns, metadata: Optional[dict] = None,
+                    registry_dir: str = REGISTRY_DIR, activate: bool = True,
+                    artifacts: Optional[dict] = None) -> str:
+    """
+    Publica uma nova versão no registry.
+    Os arquivos são escritos em um diretório temporário e renomeados de uma vez,
+    então um processo que esteja lendo nunca enxerga uma versão incompleta.
+    artifacts: arquivos JSON extras da versão ({nome_do_arquivo: objeto serializável}).
+    """
+    os.makedirs(registry_dir, exist_ok=True)
+    tmp_dir = os.path.join(registry_dir, f".tmp-{os.getpid()}-{int(time.time() * 1000)}")
+    os.makedirs(tmp_dir)
+
+    metadata = dict(metadata or {})
+    metadata.setdefault("created_at", datetime.now().isoformat(timespec="seconds"))
+    metadata.setdefault("n_features", len(model_columns))
+    joblib.dump(model, os.path.join(tmp_dir, MODEL_FILE))
+    joblib.dump(list(model_columns), os.path.join(tmp_dir, COLUMNS_FILE))
+    for name, content in (artifacts or {}).items():
+        with open(os.path.join(tmp_dir, name), "w", encoding="utf-8") as f:
+            json.dump(content, f, ensure_ascii=False, default=str)
+
+    # Reserva o próximo número de versão (tenta novamente se outro processo publicar ao mesmo tempo)
+    while True:
+        existing = list_versions(registry_dir)
+        next_number = int(_VERSION_RE.match(existing[-1]).group(1)) + 1 if existing else 1
+        version = f"v{next_number:04d}"
+        metadata["version"] = version
+        with open(os.path.join(tmp_dir, METADATA_FILE), "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2, ensure_ascii=False, default=str)
+        try:
+            os.rename(tmp_dir, os.path.join(registry_dir, version))
+            break
+        except OSError:
+            if not os.path.isdir(os.path.join(registry_dir, version)):
+                raise
+
+    if activate:
+        set_current(version, registry_dir)
+    print(f"✅ Modelo publicado no registry como {version} ({registry_dir})")
+    return version
+
+
+def load_version(version: Optional[str] = None, registry_dir: str = REGISTRY_DIR) -> ModelVersion:
+    """Carrega uma versão do registry (a versão ativa, por padrão)."""
+    version = version or current_version(registry_dir)
+    if version is None:
+        raise FileNotFoundError(f"Nenhuma versão ativa no registry: {registry_dir}")
+    version_dir = os.path.join(registry_dir, version)
+    if not os.path.isdir(version_dir):
+        raise FileNotFoundError(f"Versão {version} não encontrada em {registry_dir}")
+
+    with open(os.path.join(version_dir, METADATA_FILE), "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+    model = joblib.load(os.path.join(version_dir, MODEL_FILE))
+    model_columns = joblib.load(os.path.join(version_dir, COLUMNS_FILE))
+    return ModelVersion(version, model, model_columns, metadata)
+
+
+def load_artifact(name: str, version: Optional[str] = None, registry_dir: str = REGISTRY_DIR) -> Optional[dict]:
+    """Lê um artefato JSON extra de uma versão (None se a versão ou o arquivo não existirem)."""
+    version = version or current_version(registry_dir)
+    if version is None:
+        return None
+    try:
+        with open(os.path.join(registry_dir, version, name), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def load_legacy(model_path: str = MODEL_PATH, columns_path: str = MODEL_COLUMNS_PATH) -> ModelVersion:
+    """Carrega o par model.pkl/model_columns.pkl fora do registry (compatibilidade)."""
+    model = joblib.load(model_path)
+    model_columns = joblib.load(columns_path)
+    return ModelVersion("legacy", model, model_columns, {"source": str(model_path)})
+
+
+def load_active(registry_dir: str = REGISTRY_DIR, model_path: str = MODEL_PATH,
+                columns_path: str = MODEL_COLUMNS_PATH) -> ModelVersion:
+    """Carrega a versão ativa do registry ou, se ele estiver vazio, o modelo legado."""
+    if current_version(registry_dir) is not None:
+        return load_version(registry_dir=registry_dir)
+    return load_legacy(model_path, columns_path)
+
+
+class ModelWatcher:
+    """
+    Mantém a versão ativa do modelo em memória e troca para uma nova versão em background.
+
+    Cada requisição deve obter um snapshot com `current()` uma única vez e usá-lo até o fim:
+    a troca apenas substitui a referência, então requisições em andamento terminam na versão
+    antiga, que é liberada quando a última delas termina. A nova versão é carregada por
+    completo na thread de background antes da troca, sem bloquear quem está servindo.
+    """
+
+    def __init__(self, registry_dir: str = REGISTRY_DIR, poll_interval: float = 5.0,
+                 model_path: str = MODEL_PATH, columns_path: str = MODEL_COLUMNS_PATH,
+                 initial: Optional[ModelVersion] = None):
+        self.registry_dir = str(registry_dir)
+        self.poll_interval = poll_interval
+        self.model_path = model_path
+        self.columns_path = columns_path
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        # `initial` permite que quem cria o watcher já tenha carregado a versão ativa
+        # (ex: em paralelo com outros artefatos)
+        self._current = initial or load_active(self.registry_dir, model_path, columns_path)
+        self.last_error: Optional[str] = None
+
+    def current(self) -> ModelVersion:
+        """Snapshot da versão ativa."""
+        return self._current
+
+    def check_now(self) -> bool:
+        """Verifica o registry e troca de versão se necessário. Retorna True se houve troca."""
+        version = current_version(self.registry_dir)
+        if version is None or version == self._current.version:
+            return False
+        try:
+            new_version = load_version(version, self.registry_dir)
+        except Exception as e:
+            # Mantém a versão atual servindo; tenta novamente no próximo ciclo
+            self.last_error = f"{type(e).__name__}: {e}"
+            print(f"❌ Erro ao carregar a versão {version} do modelo: {e}")
+            return False
+        with self._lock:
+            previous = self._current.version
+            self._current = new_version
+        self.last_error = None
+        print(f"🔄 Modelo atualizado: {previous} -> {new_version.version}")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check_now()
+
+    def start(self) -> "ModelWatcher":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
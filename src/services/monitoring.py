@@ -0,0 +1,277 @@
+import atexit
+import glob
+import json
+import os
+import socket
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# --- Constantes ---
+MONITORING_DIR = "src/reports/monitoring"
+REFERENCE_ARTIFACT = "drift_reference.json"
+SCORE_FEATURE = "score_match"
+N_BINS = 20
+PSI_MODERATE = 0.1
+PSI_HIGH = 0.25
+# Abaixo disso o PSI é dominado pelo ruído de amostragem (com 10 linhas, quase todo bin fica vazio)
+MIN_SAMPLES = 100
+
+
+class FeatureSketch:
+    """
+    Histograma de tamanho fixo de uma feature.
+    Os limites dos bins são definidos no treino; contagens de sketches com os mesmos
+    limites podem ser somadas (merge) sem perda, independente de quantas linhas foram vistas.
+    """
+
+    def __init__(self, edges, counts=None, n_missing=0, total=0.0, minimum=np.inf, maximum=-np.inf):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        self.n_missing = int(n_missing)
+        self.total = float(total)
+        self.minimum = float(minimum)
+        self.maximum = float(maximum)
+
+    @property
+    def n(self) -> int:
+        return int(self.counts.sum())
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        missing = np.isnan(values)
+        if missing.any():
+            self.n_missing += int(missing.sum())
+            values = values[~missing]
+        if values.size == 0:
+            return
+        idx = np.searchsorted(self.edges, values, side="right")
+        self.counts += np.bincount(idx, minlength=len(self.counts))
+        self.total += float(values.sum())
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+
+    def merge(self, other: "FeatureSketch"):
+        if len(self.edges) != len(other.edges) or not np.allclose(self.edges, other.edges):
+            raise ValueError("Não é possível combinar sketches com bins diferentes")
+        self.counts += other.counts
+        self.n_missing += other.n_missing
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    def empty_like(self) -> "FeatureSketch":
+        return FeatureSketch(self.edges)
+
+    def to_dict(self) -> dict:
+        return {
+            "edges": self.edges.tolist(),
+            "counts": self.counts.tolist(),
+            "n_missing": self.n_missing,
+            "total": self.total,
+            "min": self.minimum if np.isfinite(self.minimum) else None,
+            "max": self.maximum if np.isfinite(self.maximum) else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FeatureSketch":
+        return cls(data["edges"], data["counts"], data.get("n_missing", 0), data.get("total", 0.0),
+                   np.inf if data.get("min") is None else data["min"],
+                   -np.inf if data.get("max") is None else data["max"])
+
+
+def _quantile_edges(values: np.ndarray, n_bins: int = N_BINS) -> np.ndarray:
+    """
+    Limites dos bins de uma feature (usados com searchsorted side="right").
+    Features com até n_bins valores distintos (ex: indicadores one-hot) têm um bin por valor,
+    com os limites entre valores consecutivos. As demais usam quantis, e o valor mínimo
+    fica em um bin próprio: sem isso, uma coluna esparsa com muitos zeros teria o zero
+    no mesmo bin dos demais valores e mudanças na proporção passariam despercebidas.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return np.array([0.0])
+    distinct = np.unique(values)
+    if distinct.size <= n_bins:
+        if distinct.size == 1:
+            return np.array([np.nextafter(distinct[0], np.inf)])
+        return (distinct[:-1] + distinct[1:]) / 2
+    quantiles = np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1])
+    minimum = distinct[0]
+    return np.unique(np.concatenate([[np.nextafter(minimum, np.inf)], quantiles[quantiles > minimum]]))
+
+
+class DriftSketch:
+    """Conjunto de sketches: um por coluna do modelo e um para o score_match."""
+
+    def __init__(self, columns, sketches: dict):
+        self.columns = list(columns)
+        self.sketches = sketches
+
+    @classmethod
+    def from_reference(cls, X, scores=None, n_bins: int = N_BINS) -> "DriftSketch":
+        """Cria o sketch de referência (no treino): bins por quantis e contagens dos dados de treino."""
+        X = pd.DataFrame(X)
+        values = X.to_numpy(dtype=np.float64, na_value=np.nan)
+        sketches = {}
+        for j, col in enumerate(X.columns):
+            sketches[col] = FeatureSketch(_quantile_edges(values[:, j], n_bins))
+        sketches[SCORE_FEATURE] = FeatureSketch(np.linspace(0, 1, n_bins + 1)[1:-1])
+        reference = cls(X.columns, sketches)
+        reference.update(values, scores)
+        return reference
+
+    def empty_like(self) -> "DriftSketch":
+        return DriftSketch(self.columns, {name: s.empty_like() for name, s in self.sketches.items()})
+
+    def update(self, X, scores=None):
+        """
+        Atualiza os sketches com um lote de linhas já alinhadas às colunas do modelo.
+        Custo por linha: uma busca binária em ~20 limites por feature (vetorizado por coluna).
+        """
+        values = X.to_numpy(dtype=np.float64, na_value=np.nan) if isinstance(X, pd.DataFrame) else np.asarray(X, dtype=np.float64)
+        if values.ndim != 2 or values.shape[1] != len(self.columns):
+            raise ValueError(f"Esperado lote com {len(self.columns)} colunas, recebido {values.shape}")
+        for j, col in enumerate(self.columns):
+            self.sketches[col].update(values[:, j])
+        if scores is not None:
+            self.sketches[SCORE_FEATURE].update(scores)
+
+    def merge(self, other: "DriftSketch") -> "DriftSketch":
+        for name, sketch in other.sketches.items():
+            self.sketches[name].merge(sketch)
+        return self
+
+    def to_dict(self) -> dict:
+        return {"columns": self.columns, "sketches": {name: s.to_dict() for name, s in self.sketches.items()}}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DriftSketch":
+        return cls(data["columns"], {name: FeatureSketch.from_dict(s) for name, s in data["sketches"].items()})
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "DriftSketch":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+# ------------------------------
+# Estatísticas de drift
+# ------------------------------
+
+def psi(reference_counts, current_counts, eps: float = 1e-4) -> float:
+    """Population Stability Index entre duas distribuições com os mesmos bins."""
+    ref = np.asarray(reference_counts, dtype=np.float64)
+    cur = np.asarray(current_counts, dtype=np.float64)
+    if ref.sum() == 0 or cur.sum() == 0:
+        return float("nan")
+    ref = np.clip(ref / ref.sum(), eps, None)
+    cur = np.clip(cur / cur.sum(), eps, None)
+    return float(np.sum((cur - ref) * np.log(cur / ref)))
+
+
+def ks(reference_counts, current_counts) -> float:
+    """Estatística KS calculada sobre os bins (maior distância entre as CDFs nos limites)."""
+    ref = np.asarray(reference_counts, dtype=np.float64)
+    cur = np.asarray(current_counts, dtype=np.float64)
+    if ref.sum() == 0 or cur.sum() == 0:
+        return float("nan")
+    return float(np.max(np.abs(np.cumsum(ref) / ref.sum() - np.cumsum(cur) / cur.sum())))
+
+
+def compare(reference: DriftSketch, current: DriftSketch, min_samples: int = MIN_SAMPLES) -> pd.DataFrame:
+    """
+    Compara o tráfego atual com a referência do treino. Retorna uma linha por feature, ordenada por PSI.
+    Features com menos de `min_samples` valores observados ficam com status "amostra pequena"
+    (PSI e KS ainda são reportados) e vão para o fim do relatório.
+    """
+    rows = []
+    for name, ref in reference.sketches.items():
+        cur = current.sketches.get(name)
+        if cur is None:
+            continue
+        feature_psi = psi(ref.counts, cur.counts)
+        status = "sem dados"
+        if not np.isnan(feature_psi):
+            if cur.n < min_samples:
+                status = "amostra pequena"
+            else:
+                status = "alto" if feature_psi >= PSI_HIGH else "moderado" if feature_psi >= PSI_MODERATE else "estável"
+        rows.append({
+            "feature": name,
+            "psi": feature_psi,
+            "ks": ks(ref.counts, cur.counts),
+            "n_referencia": ref.n,
+            "n_atual": cur.n,
+            "media_referencia": ref.total / ref.n if ref.n else np.nan,
+            "media_atual": cur.total / cur.n if cur.n else np.nan,
+            "missing_atual": cur.n_missing,
+            "status": status,
+        })
+    report = pd.DataFrame(rows)
+    if report.empty:
+        return report
+    report["_conclusivo"] = ~report["status"].isin(["amostra pequena", "sem dados"])
+    report = report.sort_values(by=["_conclusivo", "psi"], ascending=False, na_position="last")
+    return report.drop(columns="_conclusivo").reset_index(drop=True)
+
+
+# ------------------------------
+# Monitor para o caminho de scoring
+# ------------------------------
+
+class DriftMonitor:
+    """
+    Acumula os sketches do tráfego de scoring de um processo e grava periodicamente em
+    `<monitoring_dir>/<versão>/sketch_<host>_<pid>.json`. Os arquivos de vários workers
+    são combinados com `merge_sketch_files`.
+    """
+
+    def __init__(self, reference: DriftSketch, model_version: str,
+                 monitoring_dir: str = MONITORING_DIR, flush_interval: float = 60.0):
+        self.reference = reference
+        self.model_version = model_version
+        self.sketch = reference.empty_like()
+        self.path = os.path.join(monitoring_dir, model_version, f"sketch_{socket.gethostname()}_{os.getpid()}.json")
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        atexit.register(self.flush)
+
+    def update(self, X, scores=None):
+        with self._lock:
+            self.sketch.update(X, scores)
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self.sketch.sketches[SCORE_FEATURE].n == 0 and not os.path.exists(self.path):
+                return
+            self.sketch.save(self.path)
+            self._last_flush = time.monotonic()
+
+    def report(self) -> pd.DataFrame:
+        with self._lock:
+            return compare(self.reference, self.sketch)
+
+
+def merge_sketch_files(model_version: str, monitoring_dir: str = MONITORING_DIR) -> Optional[DriftSketch]:
+    """Combina os sketches gravados por todos os workers de uma versão do modelo."""
+    merged = None
+    for path in sorted(glob.glob(os.path.join(monitoring_dir, model_version, "sketch_*.json"))):
+        sketch = DriftSketch.load(path)
+        merged = sketch if merged is None else merged.merge(sketch)
+    return merged
@@ -0,0 +1,187 @@
+import json
+import os
+import shutil
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional
+
+import numpy as np
+
+from src.services.model_registry import REGISTRY_DIR
+
+# --- Constantes ---
+NATIVE_DIR = "native"
+PRUNED_NATIVE_DIR = "native_pruned"
+BOOSTER_FILE = "booster.txt"
+BUNDLE_FILE = "bundle.json"
+BUNDLE_FORMAT_VERSION = 1
+
+# O lightgbm é importado apenas ao carregar o booster, para não pesar no import do módulo.
+
+
+def native_bundle_dir(version: str, registry_dir: str = REGISTRY_DIR, pruned: bool = False) -> str:
+    """
+    Diretório do bundle nativo de uma versão do registry. O modelo legado (model.pkl fora do
+    registry) fica em `native/` no diretório de modelos, ao lado do registry.
+    pruned: diretório do bundle podado (`native_pruned/`), separado do bundle completo.
+    """
+    name = PRUNED_NATIVE_DIR if pruned else NATIVE_DIR
+    if version == "legacy":
+        return os.path.join(os.path.dirname(os.path.normpath(registry_dir)), name)
+    return os.path.join(registry_dir, version, name)
+
+
+def export_native_bundle(model, model_columns, threshold: float, out_dir: str,
+                         model_version: Optional[str] = None, num_iteration: Optional[int] = None,
+                         selection: Optional[dict] = None) -> dict:
+    """
+    Exporta o booster no formato texto nativo do LightGBM junto com as colunas e o threshold
+    em um único diretório (`booster.txt` + `bundle.json`).
+    Bundles são imutáveis como as versões do registry: se `out_dir` já existir, levanta
+    FileExistsError em vez de trocar os scores de uma versão publicada.
+    num_iteration: mantém apenas as árvores até essa iteração (ver `export_pruned_bundle`).
+    selection: como a iteração e o threshold foram escolhidos (gravado no bundle.json).
+    """
+    if os.path.exists(out_dir):
+        raise FileExistsError(f"Bundle nativo já existe em {out_dir}; bundles publicados não são sobrescritos")
+    booster = model.booster_
+    total_iterations = booster.current_iteration()
+    num_iteration = num_iteration or total_iterations
+
+    tmp_dir = f"{out_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    booster.save_model(os.path.join(tmp_dir, BOOSTER_FILE), num_iteration=num_iteration)
+    bundle = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "model_version": model_version,
+        "columns": list(model_columns),
+        "threshold": float(threshold),
+        "num_iteration": int(num_iteration),
+        "total_iterations": int(total_iterations),
+        "pruned": num_iteration < total_iterations,
+    }
+    if selection is not None:
+        bundle["selection"] = selection
+    with open(os.path.join(tmp_dir, BUNDLE_FILE), "w", encoding="utf-8") as f:
+        json.dump(bundle, f, indent=2, ensure_ascii=False)
+
+    try:
+        os.rename(tmp_dir, out_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise FileExistsError(f"Bundle nativo já existe em {out_dir}; bundles publicados não são sobrescritos")
+    print(f"✅ Bundle nativo ({num_iteration}/{total_iterations} iterações) salvo em {out_dir}")
+    return bundle
+
+
+def _f1_threshold(y_true, proba) -> float:
+    """Threshold de maior F1 na mesma grade usada no treino."""
+    from sklearn.metrics import f1_score
+
+    thresholds = np.arange(0.1, 0.9, 0.01)
+    f1_scores = [f1_score(y_true, (proba > t).astype(int)) for t in thresholds]
+    return float(thresholds[int(np.argmax(f1_scores))])
+
+
+def export_pruned_bundle(model, model_columns, X, y, out_dir: str, model_version: Optional[str] = None,
+                         random_state: int = 42) -> dict:
+    """
+    Exporta um bundle podado: só as árvores até a iteração de maior AUC.
+    X, y: dados alinhados às colunas do modelo, nas linhas e na ordem do CSV do treino. O split
+    de validação do treino é reproduzido e dividido ao meio (estratificado): a iteração é escolhida
+    em uma metade e o threshold (F1) e a AUC reportada vêm da outra, então nenhum dos dois é
+    medido nos dados usados para escolher o corte. As linhas de treino não são usadas.
+    """
+    from sklearn.metrics import roc_auc_score
+    from sklearn.model_selection import train_test_split
+
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y)
+    _, val_idx = train_test_split(np.arange(len(y)), test_size=0.2, random_state=random_state, stratify=y)
+    sel_idx, holdout_idx = train_test_split(val_idx, test_size=0.5, random_state=random_state, stratify=y[val_idx])
+
+    # AUC por iteração na metade de seleção, somando a contribuição de cada árvore ao score bruto
+    booster = model.booster_
+    total_iterations = booster.current_iteration()
+    raw = np.zeros(len(sel_idx))
+    aucs = []
+    for i in range(total_iterations):
+        raw += booster.predict(X[sel_idx], start_iteration=i, num_iteration=1, raw_score=True)
+        aucs.append(roc_auc_score(y[sel_idx], raw))
+    num_iteration = int(np.argmax(aucs)) + 1
+
+    proba_pruned = booster.predict(X[holdout_idx], num_iteration=num_iteration)
+    proba_full = booster.predict(X[holdout_idx])
+    selection = {
+        "selection_rows": int(len(sel_idx)),
+        "holdout_rows": int(len(holdout_idx)),
+        "selection_auc": float(aucs[num_iteration - 1]),
+        "holdout_auc": float(roc_auc_score(y[holdout_idx], proba_pruned)),
+        "holdout_auc_full": float(roc_auc_score(y[holdout_idx], proba_full)),
+        "threshold_source": "F1 na metade de holdout da validação, com o booster podado",
+    }
+    threshold = _f1_threshold(y[holdout_idx], proba_pruned)
+    print(f"Poda: {num_iteration}/{total_iterations} iterações | AUC holdout {selection['holdout_auc']:.4f} "
+          f"(completo: {selection['holdout_auc_full']:.4f}) | threshold {threshold:.2f}")
+    return export_native_bundle(model, model_columns, threshold, out_dir, model_version=model_version,
+                                num_iteration=num_iteration, selection=selection)
+
+
+@dataclass
+class NativePredictor:
+    """
+    Preditor enxuto sobre o Booster nativo do LightGBM: recebe arrays float32 já alinhados
+    às colunas do modelo e chama o booster diretamente, sem o wrapper do scikit-learn
+    nem a validação de DataFrame a cada chamada.
+    """
+    booster: Any
+    columns: list
+    threshold: float
+    metadata: dict = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, bundle_dir: str) -> "NativePredictor":
+        import lightgbm as lgb
+
+        with open(os.path.join(bundle_dir, BUNDLE_FILE), "r", encoding="utf-8") as f:
+            bundle = json.load(f)
+        if bundle.get("format_version") != BUNDLE_FORMAT_VERSION:
+            raise ValueError(f"Formato do bundle não suportado: {bundle.get('format_version')}")
+        booster = lgb.Booster(model_file=os.path.join(bundle_dir, BOOSTER_FILE))
+        if booster.num_feature() != len(bundle["columns"]):
+            raise ValueError(f"Booster com {booster.num_feature()} features, bundle com {len(bundle['columns'])} colunas")
+        return cls(booster, bundle["columns"], bundle["threshold"], bundle)
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.metadata.get("model_version")
+
+    def score(self, X) -> np.ndarray:
+        """Probabilidade da classe positiva para cada linha (n_linhas x n_colunas do modelo)."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != len(self.columns):
+            raise ValueError(f"Esperado array com {len(self.columns)} colunas, recebido {X.shape}")
+        return self.booster.predict(X)
+
+    def predict(self, X) -> np.ndarray:
+        """Classe prevista com o threshold do treino."""
+        return (self.score(X) > self.threshold).astype(np.int8)
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Compatível com `LGBMClassifier.predict_proba` (colunas: classe 0, classe 1)."""
+        proba = self.score(X)
+        return np.column_stack([1.0 - proba, proba])
+
+
+def load_native(version: str, registry_dir: str = REGISTRY_DIR, pruned: bool = False) -> NativePredictor:
+    """
+    Carrega o bundle nativo de uma versão do registry.
+    pruned: carrega o bundle podado (scores e threshold diferentes do modelo completo).
+    """
+    bundle_dir = native_bundle_dir(version, registry_dir, pruned)
+    if not os.path.exists(os.path.join(bundle_dir, BUNDLE_FILE)):
+        command = "export-native --prune" if pruned else "export-native"
+        raise FileNotFoundError(f"Bundle nativo não encontrado em {bundle_dir}; execute `python -m src.main {command}`.")
+    return NativePredictor.load(bundle_dir)
@@ -1,15 +1,20 @@
 import json
+import os
 import pandas as pd
 import numpy as np
 import re
-from sklearn.preprocessing import LabelEncoder, MinMaxScaler
+from functools import partial
+from src.utils.instrumentation import span
+from src.utils.utils import load_concurrently
 
-def load_json(path: str) -> dict:
+def load_json(path: str, strict: bool = False) -> dict:
     try:
         with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
     except Exception as e:
         print(f"Erro ao carregar {path}: {e}")
+        if strict:
+            raise
         return {}
 
 def flatten_jobs(job_json: dict, key_prefix: str) -> pd.DataFrame:
@@ -70,6 +75,8 @@ def extract_cv_features(df: pd.DataFrame, cv_col="cv_pt") -> pd.DataFrame:
     return df
 
 def encode_and_normalize(df: pd.DataFrame, categorical_cols=[], numerical_cols=[]):
+    # Importado aqui: o scikit-learn sozinho levava o startup do comando `preprocess` para mais de 1s
+    from sklearn.preprocessing import LabelEncoder, MinMaxScaler
     df = df.copy()
     encoders = {}
     for col in categorical_cols:
@@ -88,27 +95,37 @@ def encode_and_normalize(df: pd.DataFrame, categorical_cols=[], numerical_cols=[
 # ------------------------------
 
 def pipeline_preprocessing(applicants_path, prospects_path, vagas_path):
-    # Carregar JSONs
+    # Carregar JSONs (em paralelo: os três arquivos são independentes)
     print("Carregando JSONs...")
-    applicants = load_json(applicants_path)
-    prospects = load_json(prospects_path)
-    vagas = load_json(vagas_path)
+    with span("load_json") as s:
+        loaded = load_concurrently({
+            "applicants": partial(load_json, applicants_path, strict=True),
+            "prospects": partial(load_json, prospects_path, strict=True),
+            "vagas": partial(load_json, vagas_path, strict=True),
+        })
+        applicants, prospects, vagas = loaded["applicants"], loaded["prospects"], loaded["vagas"]
+        s.set(bytes_read=sum(os.path.getsize(p) for p in (applicants_path, prospects_path, vagas_path) if os.path.exists(p)))
     
     # Transformar em DataFrame
     print("Transformando em DataFrame...")
-    applicants_df = pd.DataFrame.from_dict(applicants, orient='index').reset_index(drop=True)
-    prospects_df = flatten_jobs(prospects, "prospects")
-    vagas_df = flatten_jobs(vagas, "vagas")
+    with span("flatten") as s:
+        applicants_df = pd.DataFrame.from_dict(applicants, orient='index').reset_index(drop=True)
+        prospects_df = flatten_jobs(prospects, "prospects")
+        vagas_df = flatten_jobs(vagas, "vagas")
+        s.set(applicants_rows=len(applicants_df), prospects_rows=len(prospects_df), vagas_rows=len(vagas_df))
     
     # Limpeza
     print("Limpeza de dados...")
-    applicants_df = clean_df(applicants_df)
-    prospects_df = clean_df(prospects_df)
-    vagas_df = clean_df(vagas_df)
+    with span("clean"):
+        applicants_df = clean_df(applicants_df)
+        prospects_df = clean_df(prospects_df)
+        vagas_df = clean_df(vagas_df)
     
     # Features de CV
     print("Extração de features de CV...")
-    applicants_df = extract_cv_features(applicants_df)
+    with span("cv_features") as s:
+        applicants_df = extract_cv_features(applicants_df)
+        s.set(rows=len(applicants_df))
     
     # Encoding + Normalização
     print("Encoding + Normalização...")
@@ -117,13 +134,16 @@ def pipeline_preprocessing(applicants_path, prospects_path, vagas_path):
                         "formacao_e_idiomas_nivel_espanhol", 
                         "informacoes_profissionais_area_atuacao"]
     numerical_cols = ["cv_word_count","cv_char_count","cv_experience_years","cv_total_skills"]
-    applicants_df, encoders, scaler = encode_and_normalize(applicants_df, categorical_cols, numerical_cols)
+    with span("encode_normalize"):
+        applicants_df, encoders, scaler = encode_and_normalize(applicants_df, categorical_cols, numerical_cols)
     
     # Merge final
     print("Merge final...")
-    applicants_df['applicant_id'] = applicants_df.index.astype(str)
-    df = prospects_df.merge(applicants_df, left_on="codigo", right_on="applicant_id", how="left")
-    df = df.merge(vagas_df, on="job_id", how="left")
+    with span("merge") as s:
+        applicants_df['applicant_id'] = applicants_df.index.astype(str)
+        df = prospects_df.merge(applicants_df, left_on="codigo", right_on="applicant_id", how="left")
+        df = df.merge(vagas_df, on="job_id", how="left")
+        s.set(rows=len(df), columns=len(df.columns))
     
     # Target simplificada
     print("Target simplificado...")
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+TARGET_COL = "target"
+DISPLAY_COLUMNS = ['applicant_id', 'nome', 'cv_experience_years', 'cv_total_skills']
+
+
+def normalize_ids(values) -> np.ndarray:
+    """
+    Chaves (applicant_id, job_id) como texto estável. Um merge com linhas sem par deixa a coluna
+    float no CSV, então 382 vira "382.0"; aqui floats inteiros viram "382" e ausentes viram "".
+    """
+    ids = pd.Series(values)
+    missing = ids.isna().to_numpy()
+    if pd.api.types.is_float_dtype(ids):
+        integral = ~missing & (ids.fillna(0) % 1 == 0).to_numpy()
+        out = ids.astype(str).to_numpy(dtype=object)
+        out[integral] = ids[integral].astype(np.int64).astype(str).to_numpy()
+    else:
+        out = ids.astype(str).to_numpy(dtype=object)
+    out[missing] = ""
+    return out.astype(str)
+
+
+def prepare_data_for_prediction(df: pd.DataFrame, model_columns) -> pd.DataFrame:
+    """Prepara os dados para predição, alinhando com as colunas do modelo."""
+    # Aplicar one-hot encoding
+    df_processed = pd.get_dummies(df, dummy_na=True)
+
+    # Alinhar com as colunas do modelo
+    df_aligned = df_processed.reindex(columns=model_columns, fill_value=0)
+
+    return df_aligned
+
+
+def score_candidates(model, model_columns, df_featured: pd.DataFrame, job_id=None, monitor=None) -> pd.DataFrame:
+    """
+    Calcula o score de match dos candidatos de uma vaga (ou de todas, se job_id for None).
+    Retorna as linhas do dataset com features acrescidas da coluna 'score_match'.
+    monitor: DriftMonitor opcional, atualizado com as features e scores do lote.
+    """
+    if job_id is None:
+        df_job = df_featured.copy()
+    else:
+        df_job = df_featured[df_featured['job_id'] == job_id].copy()
+    if df_job.empty:
+        df_job['score_match'] = pd.Series(dtype=float)
+        return df_job
+
+    X_job = df_job.drop(columns=[TARGET_COL], errors='ignore')
+    X_job_prepared = prepare_data_for_prediction(X_job, model_columns)
+    df_job['score_match'] = model.predict_proba(X_job_prepared)[:, 1]
+    if monitor is not None:
+        monitor.update(X_job_prepared, df_job['score_match'].to_numpy())
+    return df_job
+
+
+def score_candidates_from_store(model, store, job_id=None, monitor=None) -> pd.DataFrame:
+    """
+    Mesmo que `score_candidates`, mas lendo a matriz já alinhada do feature store
+    (fatia contígua da vaga, sem parse de CSV nem get_dummies; todas as linhas se job_id for None).
+    Retorna 'job_id', 'applicant_id' e 'score_match'.
+    """
+    rows = store.job_slice(job_id) if job_id is not None else slice(None)
+    df_job = pd.DataFrame({
+        'job_id': store.job_id[rows],
+        'applicant_id': store.applicant_id[rows],
+    })
+    if df_job.empty:
+        df_job['score_match'] = pd.Series(dtype=float)
+        return df_job
+
+    X_job_prepared = store.frame(rows)
+    df_job['score_match'] = model.predict_proba(X_job_prepared)[:, 1]
+    if monitor is not None:
+        monitor.update(X_job_prepared, df_job['score_match'].to_numpy())
+    return df_job
+
+
+def rank_candidates(df_scored: pd.DataFrame, df_processed: pd.DataFrame,
+                    top_n: int = None, min_score: float = 0.0) -> pd.DataFrame:
+    """Junta os scores com os dados legíveis dos candidatos e ordena do maior para o menor."""
+    display_cols = [c for c in DISPLAY_COLUMNS if c in df_processed.columns]
+    # Chaves comparadas como texto: o CSV lê applicant_id como número e o feature store como string
+    scored = df_scored[['applicant_id', 'score_match']].assign(applicant_id=lambda d: normalize_ids(d['applicant_id']))
+    processed = df_processed[display_cols].assign(applicant_id=lambda d: normalize_ids(d['applicant_id']))
+    processed = processed[processed['applicant_id'] != ""].drop_duplicates(subset=['applicant_id'])
+    display_data = pd.merge(
+        scored,
+        processed,
+        on='applicant_id',
+        how='left'
+    )
+    filtered_data = display_data[display_data['score_match'] >= min_score]
+    ranked = filtered_data.sort_values(by='score_match', ascending=False)
+    return ranked.head(top_n) if top_n else ranked
@@ -6,7 +6,14 @@ from sklearn.model_selection import train_test_split, cross_val_score, Stratifie
 from sklearn.metrics import roc_auc_score, f1_score, accuracy_score, classification_report
 import warnings
 import os
+import time
 import optuna  
+from src.utils.instrumentation import span
+from src.services.model_registry import publish_version, set_current, REGISTRY_DIR
+from src.services.monitoring import DriftSketch, REFERENCE_ARTIFACT
+from src.services.feature_store import write_feature_matrix, FEATURE_STORE_DIR
+from src.services.scoring import prepare_data_for_prediction
+from src.services.native_model import export_native_bundle, native_bundle_dir
 
 # Desabilitar logs detalhados do Optuna para manter a saída limpa
 optuna.logging.set_verbosity(optuna.logging.WARNING)
@@ -16,11 +23,12 @@ warnings.filterwarnings('ignore')
 # Configurações
 DATA_PATH = "src/data/processed/feature_engineered_data.csv"
 MODEL_PATH = "src/models/model.pkl"
+MODEL_COLUMNS_PATH = "src/models/model_columns.pkl"
 TARGET_COL = "target"
 
-def load_data():
+def load_data(path=DATA_PATH):
     """Carrega os dados"""
-    df = pd.read_csv(DATA_PATH)
+    df = pd.read_csv(path)
     return df
 
 def prepare_features(df):
@@ -83,8 +91,34 @@ def cross_validate_model(X, y):
     scores = cross_val_score(model, X, y, cv=cv, scoring='roc_auc', n_jobs=-1)
     return scores
 
+def downsample_negatives(y, groups, rate, random_state=42):
+    """
+    Subamostra os negativos a uma taxa `rate`, estratificado por grupo (job_id): cada vaga
+    mantém ceil(rate * negativos_da_vaga) negativos e todos os positivos.
+    Retorna (posições mantidas, sample_weight). Os negativos mantidos recebem peso
+    negativos_da_vaga / negativos_mantidos, então a distribuição ponderada é igual à original
+    e as probabilidades previstas continuam calibradas como no treino com todos os dados.
+    """
+    if not 0 < rate <= 1:
+        raise ValueError(f"neg_sample_rate deve estar em (0, 1]: {rate}")
+    y = np.asarray(y)
+    groups = np.asarray(groups) if groups is not None else np.zeros(len(y))
+    rng = np.random.default_rng(random_state)
+
+    frame = pd.DataFrame({'group': groups, 'neg': y == 0, 'u': rng.random(len(y))})
+    negatives = frame[frame['neg']]
+    n_neg = negatives.groupby('group')['u'].transform('size').to_numpy()
+    n_keep = np.ceil(rate * n_neg)
+    rank = negatives.groupby('group')['u'].rank(method='first').to_numpy()
+    kept_neg = negatives.index.to_numpy()[rank <= n_keep]
+
+    weights = np.ones(len(y), dtype=np.float64)
+    weights[negatives.index.to_numpy()] = n_neg / n_keep
+    keep = np.sort(np.concatenate([np.flatnonzero(y != 0), kept_neg]))
+    return keep, weights[keep]
+
 # 2. Nova função 'objective' para o Optuna
-def objective(trial, X_train, y_train, X_val, y_val, scale_pos_weight):
+def objective(trial, X_train, y_train, X_val, y_val, scale_pos_weight, sample_weight=None):
     params = {
         'objective': 'binary',
         'metric': 'auc',
@@ -104,6 +138,7 @@ def objective(trial, X_train, y_train, X_val, y_val, scale_pos_weight):
 
     model = LGBMClassifier(**params)
     model.fit(X_train, y_train,
+              sample_weight=sample_weight,
               eval_set=[(X_val, y_val)],
               eval_metric='auc',
               callbacks=[optuna.integration.LightGBMPruningCallback(trial, 'auc')]) # Pruning para otimizar a busca
@@ -113,20 +148,45 @@ def objective(trial, X_train, y_train, X_val, y_val, scale_pos_weight):
     return auc
 
 # 3. Função de treino modificada para usar o Optuna
-def train_model(X, y):
+def train_model(X, y, columns_path=MODEL_COLUMNS_PATH, groups=None, neg_sample_rate=1.0,
+                refit_full=False, n_trials=30):
     """
     Executa a otimização de hiperparâmetros com Optuna e treina o modelo final.
+    neg_sample_rate < 1: a busca usa apenas essa fração dos negativos do treino
+    (estratificada por `groups`, ex: job_id) com pesos que corrigem a subamostragem.
+    refit_full: treina o modelo final com todos os dados de treino em vez da amostra.
+    A validação usa sempre todos os dados, então as AUCs são comparáveis.
+    Retorna (modelo, threshold, y_val, probabilidades na validação, melhores parâmetros,
+    fração dos negativos do treino mantida na busca).
     """
-    X_train, X_val, y_train, y_val = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
+    if groups is None:
+        groups = np.zeros(len(y))
+    X_train, X_val, y_train, y_val, groups_train, _ = train_test_split(
+        X, y, np.asarray(groups), test_size=0.2, random_state=42, stratify=y
     )
     scale_pos_weight = len(y_train[y_train == 0]) / len(y_train[y_train == 1])
 
+    X_search, y_search, w_search = X_train, y_train, None
+    kept_negative_fraction = 1.0
+    if neg_sample_rate < 1.0:
+        keep, w_search = downsample_negatives(y_train, groups_train, neg_sample_rate)
+        X_search, y_search = X_train.iloc[keep], y_train.iloc[keep]
+        # ceil(rate * negativos) por vaga: vagas pequenas mantêm bem mais que `rate`
+        kept_negative_fraction = float((y_search == 0).sum() / (y_train == 0).sum())
+        print(f"Subamostragem de negativos ({neg_sample_rate:.0%}): {len(X_train)} -> {len(X_search)} linhas na busca "
+              f"({kept_negative_fraction:.1%} dos negativos mantidos)")
+
     # --- Otimização com Optuna ---
     print("🚀 Iniciando otimização de hiperparâmetros com Optuna...")
-    study = optuna.create_study(direction='maximize', pruner=optuna.pruners.MedianPruner())
+    # Sampler com semente: buscas com os mesmos dados sugerem os mesmos parâmetros, e na
+    # comparação de subamostragem a diferença de AUC não vem do acaso do sampler
+    study = optuna.create_study(direction='maximize', pruner=optuna.pruners.MedianPruner(),
+                                sampler=optuna.samplers.TPESampler(seed=42))
     # Aumente n_trials para uma busca mais exaustiva (ex: 100), mas 30 já é um bom começo.
-    study.optimize(lambda trial: objective(trial, X_train, y_train, X_val, y_val, scale_pos_weight), n_trials=30)
+    with span("optuna_search", n_trials=n_trials, neg_sample_rate=neg_sample_rate) as s:
+        study.optimize(lambda trial: objective(trial, X_search, y_search, X_val, y_val, scale_pos_weight, w_search),
+                       n_trials=n_trials)
+        s.set(rows=len(X_search), best_auc=study.best_value, kept_negative_fraction=kept_negative_fraction)
     
     best_params = study.best_params
     print("✅ Otimização concluída!")
@@ -142,10 +202,16 @@ def train_model(X, y):
     })
     
     model = LGBMClassifier(**final_params)
-    model.fit(X_train, y_train)
+    if refit_full or w_search is None:
+        with span("final_fit", rows=len(X_train)):
+            model.fit(X_train, y_train)
+    else:
+        with span("final_fit", rows=len(X_search)):
+            model.fit(X_search, y_search, sample_weight=w_search)
     model_columns = X_train.columns.tolist()
-    joblib.dump(model_columns, 'src/models/model_columns.pkl')
-    print(f"Lista de {len(model_columns)} colunas do modelo salva em src/models/model_columns.pkl")
+    if columns_path:
+        joblib.dump(model_columns, columns_path)
+        print(f"Lista de {len(model_columns)} colunas do modelo salva em {columns_path}")
 
     y_pred_proba = model.predict_proba(X_val)[:, 1]
 
@@ -155,32 +221,105 @@ def train_model(X, y):
     best_idx = np.argmax(f1_scores)
     best_threshold = thresholds[best_idx]
 
-    return model, best_threshold, y_val, y_pred_proba, best_params
+    return model, best_threshold, y_val, y_pred_proba, best_params, kept_negative_fraction
 
-def save_model(model):
+def compare_negative_downsampling(X, y, groups, neg_sample_rate, refit_full=False, n_trials=30):
+    """
+    Treina com todos os dados e com negativos subamostrados e compara AUC de validação
+    e tempo de parede. Retorna (DataFrame com uma linha por modo, resultado do `train_model`
+    subamostrado), para que o treino subamostrado seja reaproveitado como modelo final.
+    """
+    rows, result = [], None
+    for label, rate in [("todos os dados", 1.0), (f"negativos {neg_sample_rate:.0%}", neg_sample_rate)]:
+        start = time.perf_counter()
+        result = train_model(X, y, None, groups, rate, refit_full, n_trials)
+        y_val, y_pred_proba = result[2], result[3]
+        rows.append({
+            "modo": label,
+            "negativos_mantidos": result[5],
+            "auc_validacao": roc_auc_score(y_val, y_pred_proba),
+            "tempo_s": time.perf_counter() - start,
+        })
+    report = pd.DataFrame(rows)
+    report["speedup"] = report["tempo_s"].iloc[0] / report["tempo_s"]
+    print("=" * 60)
+    print("Comparação: treino completo vs. negativos subamostrados")
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print("=" * 60)
+    return report, result
+
+def save_model(model, path=MODEL_PATH):
     """Salva o modelo"""
-    os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
-    joblib.dump(model, MODEL_PATH)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    joblib.dump(model, path)
 
-def pipeline_train():
+def pipeline_train(data_path=DATA_PATH, model_path=MODEL_PATH, columns_path=MODEL_COLUMNS_PATH,
+                   registry_dir=REGISTRY_DIR, feature_store_dir=FEATURE_STORE_DIR,
+                   neg_sample_rate=1.0, refit_full=False, compare_downsampling=False):
     try:
-        df = load_data() 
-        X, y = prepare_features(df)
+        with span("load_data") as s:
+            df = load_data(data_path) 
+            s.set(rows=len(df))
+        with span("prepare_features") as s:
+            X, y = prepare_features(df)
+            s.set(rows=X.shape[0], columns=X.shape[1])
 
         if X.shape[0] < 1000:
             print("⚠️ Poucos dados para treinamento!")
         if X.shape[1] < 5:
             raise ValueError(f"Muito poucas features após limpeza: {X.shape[1]}")
         
-        model, best_threshold, y_val, y_pred_proba, best_params = train_model(X, y)
-        save_model(model)
+        os.makedirs(os.path.dirname(columns_path), exist_ok=True)
+        groups = df['job_id'] if 'job_id' in df.columns else None
+        comparison = None
+        if compare_downsampling and neg_sample_rate < 1.0:
+            # O treino subamostrado da comparação já é o modelo final
+            comparison, result = compare_negative_downsampling(X, y, groups, neg_sample_rate, refit_full)
+        else:
+            result = train_model(X, y, columns_path, groups, neg_sample_rate, refit_full)
+        model, best_threshold, y_val, y_pred_proba, best_params, kept_negative_fraction = result
+        save_model(model, model_path)
         model_columns = X.columns.tolist()
-        joblib.dump(model_columns, 'src/models/model_columns.pkl')
-        print(f"✅ Lista de {len(model_columns)} colunas do modelo salva em src/models/model_columns.pkl")
+        joblib.dump(model_columns, columns_path)
+        print(f"✅ Lista de {len(model_columns)} colunas do modelo salva em {columns_path}")
         y_pred = (y_pred_proba > best_threshold).astype(int)
         auc = roc_auc_score(y_val, y_pred_proba)
         accuracy = accuracy_score(y_val, y_pred)
 
+        # Publica a nova versão no registry (o app troca de versão sem reiniciar),
+        # junto com o sketch de referência usado no monitoramento de drift
+        version = None
+        if registry_dir:
+            # Referência na mesma população que o app pontua (todas as linhas, alinhadas como no
+            # scoring): só a validação teria scores menos confiantes e o score_match
+            # apareceria sempre como drift
+            with span("drift_reference"):
+                X_serving = prepare_data_for_prediction(df.drop(columns=[TARGET_COL]), model_columns)
+                reference = DriftSketch.from_reference(X_serving, model.predict_proba(X_serving)[:, 1])
+            version = publish_version(model, model_columns, {
+                "auc": float(auc),
+                "f1": float(f1_score(y_val, y_pred)),
+                "accuracy": float(accuracy),
+                "threshold": float(best_threshold),
+                "best_params": best_params,
+                "data_path": str(data_path),
+                "neg_sample_rate": neg_sample_rate,
+                "kept_negative_fraction": kept_negative_fraction,
+                "refit_full": refit_full,
+                "downsampling_comparison": None if comparison is None else comparison.to_dict(orient="records"),
+            }, registry_dir=registry_dir, activate=False, artifacts={REFERENCE_ARTIFACT: reference.to_dict()})
+            # Booster no formato nativo do LightGBM (carregamento e predição sem o wrapper do sklearn).
+            # A versão só é ativada depois do bundle: quem segue o CURRENT (app, `score --native`)
+            # nunca enxerga uma versão sem ele
+            export_native_bundle(model, model_columns, best_threshold, native_bundle_dir(version, registry_dir),
+                                 model_version=version)
+            set_current(version, registry_dir)
+
+        # Matriz final alinhada (float32, memory-map) para avaliação, app e scoring
+        if feature_store_dir:
+            with span("feature_store", rows=len(df)):
+                write_feature_matrix(df, model_columns, feature_store_dir, model_version=version)
+
         print("=" * 60)
         print("✅ TREINAMENTO OTIMIZADO CONCLUÍDO COM SUCESSO!")
         print(f"AUC (validação): {auc:.4f}")
@@ -0,0 +1,98 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+lightgbm = pytest.importorskip("lightgbm")
+
+from src.services.feature_engineering import LEVEL_MAP
+from src.services.feature_store import open_feature_matrix, write_feature_matrix
+from src.services.job_ranking import JobIndex, score_jobs_for_applicant
+from src.services.scoring import TARGET_COL, normalize_ids, prepare_data_for_prediction
+
+LEVELS = list(LEVEL_MAP)
+CITIES = ["São Paulo", "Rio de Janeiro", "Barueri"]
+
+
+def _applications(n_applicants=40, n_jobs=12, per_applicant=3, seed=0):
+    """Candidaturas sintéticas com colunas de vaga constantes por vaga e de candidato por candidato."""
+    rng = np.random.default_rng(seed)
+    jobs = pd.DataFrame({
+        "job_id": np.arange(100, 100 + n_jobs),
+        "perfil_vaga_nivel_profissional": rng.choice(LEVELS, n_jobs),
+        "perfil_vaga_cidade": rng.choice(CITIES, n_jobs),
+        "informacoes_basicas_salario": rng.random(n_jobs),
+    })
+    applicants = pd.DataFrame({
+        "applicant_id": np.arange(300, 300 + n_applicants),
+        "informacoes_profissionais_nivel_profissional": rng.choice(LEVELS, n_applicants),
+        "informacoes_pessoais_local": [f"{c}, SP" for c in rng.choice(CITIES, n_applicants)],
+        "cv_experience_years": rng.random(n_applicants) * 10,
+    })
+    pairs = pd.DataFrame({
+        "applicant_id": np.repeat(applicants["applicant_id"], per_applicant),
+        "job_id": rng.choice(jobs["job_id"], n_applicants * per_applicant),
+    }).drop_duplicates()
+    df = pairs.merge(applicants, on="applicant_id").merge(jobs, on="job_id")
+    # Mesmas regras de interação do feature_engineering
+    df["match_nivel_profissional"] = (df["informacoes_profissionais_nivel_profissional"].map(LEVEL_MAP)
+                                      >= df["perfil_vaga_nivel_profissional"].map(LEVEL_MAP)).astype(int)
+    cand_city = df["informacoes_pessoais_local"].str.split(",").str[0]
+    df["match_cidade"] = (df["perfil_vaga_cidade"].str.lower() == cand_city.str.lower()).astype(int)
+    df[TARGET_COL] = rng.integers(0, 2, len(df))
+    return df
+
+
+def _fit(df):
+    X = pd.get_dummies(df.drop(columns=[TARGET_COL, "applicant_id", "job_id"]), dummy_na=True)
+    model = lightgbm.LGBMClassifier(n_estimators=20, min_child_samples=2, verbose=-1, random_state=42)
+    # Sem nomes de features: o LightGBM não aceita a vírgula das dummies de "Cidade, UF"
+    return model.fit(X.to_numpy(dtype=np.float32), df[TARGET_COL]), X.columns.tolist()
+
+
+def test_normalize_ids_formats_integral_floats_and_blanks_missing():
+    assert list(normalize_ids(pd.Series([382.0, np.nan, 12.5]))) == ["382", "", "12.5"]
+    assert list(normalize_ids(["382", 7])) == ["382", "7"]
+
+
+def test_unmatched_prospect_does_not_break_applicant_keys(tmp_path):
+    df = _applications()
+    # Prospect sem candidato correspondente: o merge deixa applicant_id NaN (e a coluna float)
+    orphan = df.iloc[[0]].assign(applicant_id=np.nan)
+    df = pd.concat([df, orphan], ignore_index=True)
+    assert df["applicant_id"].dtype == float
+    model, columns = _fit(df)
+
+    write_feature_matrix(df, columns, str(tmp_path / "store"))
+    store = open_feature_matrix(str(tmp_path / "store"))
+    job_index = JobIndex.build(store, df)
+
+    assert "300" in set(store.applicant_id) and "300.0" not in set(store.applicant_id)
+    assert job_index.applicant_rows("300").size > 0
+    assert job_index.applicant_rows(300).size > 0
+    assert job_index.applicant_rows("nan").size == 0
+    assert "nan" not in job_index.applicant_info.index
+    assert len(score_jobs_for_applicant(model, job_index, "300")) == len(job_index)
+
+
+def test_broadcast_batch_matches_existing_applications(tmp_path):
+    df = _applications()
+    model, columns = _fit(df)
+    write_feature_matrix(df, columns, str(tmp_path / "store"))
+    store = open_feature_matrix(str(tmp_path / "store"))
+    job_index = JobIndex.build(store, df)
+
+    expected = model.predict_proba(prepare_data_for_prediction(df.drop(columns=[TARGET_COL]), columns))[:, 1]
+    expected = pd.Series(expected, index=pd.MultiIndex.from_arrays(
+        [normalize_ids(df["applicant_id"]), normalize_ids(df["job_id"])]))
+
+    for applicant_id in df["applicant_id"].unique()[:10]:
+        scored = score_jobs_for_applicant(model, job_index, applicant_id).set_index("job_id")
+        applied = scored[scored["candidatura_existente"]]
+        assert len(applied) > 0
+        for job_id, row in applied.iterrows():
+            assert row["score_match"] == pytest.approx(expected[(str(applicant_id), job_id)], abs=1e-6)
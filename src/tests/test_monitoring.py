@@ -0,0 +1,76 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from src.services.monitoring import PSI_HIGH, DriftSketch, compare
+
+
+def _indicator(n, rate, rng):
+    return (rng.random(n) < rate).astype(float)
+
+
+def test_shift_in_rare_indicator_is_flagged():
+    rng = np.random.default_rng(0)
+    reference = DriftSketch.from_reference(pd.DataFrame({"cidade_SP": _indicator(10_000, 0.03, rng)}))
+
+    current = reference.empty_like()
+    current.update(pd.DataFrame({"cidade_SP": _indicator(2_000, 0.60, rng)}))
+    row = compare(reference, current).set_index("feature").loc["cidade_SP"]
+
+    assert row["psi"] >= PSI_HIGH
+    assert row["ks"] > 0.5
+    assert row["status"] == "alto"
+
+
+def test_stable_indicator_is_not_flagged():
+    rng = np.random.default_rng(1)
+    reference = DriftSketch.from_reference(pd.DataFrame({"cidade_SP": _indicator(10_000, 0.03, rng)}))
+
+    current = reference.empty_like()
+    current.update(pd.DataFrame({"cidade_SP": _indicator(10_000, 0.03, rng)}))
+    row = compare(reference, current).set_index("feature").loc["cidade_SP"]
+
+    assert row["status"] == "estável"
+
+
+def test_mass_at_minimum_gets_its_own_bin():
+    rng = np.random.default_rng(2)
+    values = np.where(rng.random(10_000) < 0.9, 0.0, rng.random(10_000) * 100)
+    reference = DriftSketch.from_reference(pd.DataFrame({"cv_complexity": values}))
+
+    current = reference.empty_like()
+    shifted = np.where(rng.random(2_000) < 0.5, 0.0, rng.random(2_000) * 100)
+    current.update(pd.DataFrame({"cv_complexity": shifted}))
+
+    assert compare(reference, current).set_index("feature").loc["cv_complexity", "psi"] >= PSI_HIGH
+
+
+def test_small_sample_is_not_classified():
+    rng = np.random.default_rng(3)
+    reference = DriftSketch.from_reference(pd.DataFrame({"cv_complexity": rng.random(10_000) * 100}))
+
+    current = reference.empty_like()
+    current.update(pd.DataFrame({"cv_complexity": rng.random(10) * 100}))
+    row = compare(reference, current).set_index("feature").loc["cv_complexity"]
+
+    assert row["n_atual"] == 10
+    assert row["status"] == "amostra pequena"
+
+
+def test_small_sample_features_go_last():
+    rng = np.random.default_rng(4)
+    reference = DriftSketch.from_reference(pd.DataFrame({"a": rng.random(10_000), "b": rng.random(10_000)}))
+
+    current = reference.empty_like()
+    current.update(pd.DataFrame({"a": rng.random(1_000) + 0.5, "b": np.full(1_000, np.nan)}))
+    current.sketches["b"].update(rng.random(5))
+    report = compare(reference, current)
+
+    assert list(report["feature"][:2]) == ["a", "b"]
+    assert list(report["status"][:2]) == ["alto", "amostra pequena"]
@@ -0,0 +1,64 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+lightgbm = pytest.importorskip("lightgbm")
+
+from src.services.native_model import (BUNDLE_FILE, NativePredictor, export_native_bundle, export_pruned_bundle,
+                                       native_bundle_dir)
+
+
+@pytest.fixture(scope="module")
+def trained():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((2_000, 6)).astype(np.float32), columns=[f"f{i}" for i in range(6)])
+    y = ((X["f0"] + 0.5 * X["f1"] + rng.normal(0, 0.3, len(X))) > 0.9).astype(int)
+    model = lightgbm.LGBMClassifier(n_estimators=60, learning_rate=0.1, verbose=-1, random_state=42).fit(X, y)
+    return model, X, y
+
+
+def test_unpruned_bundle_matches_predict_proba(trained, tmp_path):
+    model, X, _ = trained
+    out_dir = str(tmp_path / "native")
+    export_native_bundle(model, list(X.columns), 0.5, out_dir, model_version="v0001")
+
+    predictor = NativePredictor.load(out_dir)
+    np.testing.assert_allclose(predictor.score(X.to_numpy()), model.predict_proba(X)[:, 1], rtol=0, atol=1e-9)
+    assert predictor.version == "v0001"
+    assert not predictor.metadata["pruned"]
+
+
+def test_published_bundle_is_never_overwritten(trained, tmp_path):
+    model, X, _ = trained
+    out_dir = str(tmp_path / "native")
+    export_native_bundle(model, list(X.columns), 0.5, out_dir)
+    with open(os.path.join(out_dir, BUNDLE_FILE), encoding="utf-8") as f:
+        before = json.load(f)
+
+    with pytest.raises(FileExistsError):
+        export_native_bundle(model, list(X.columns), 0.9, out_dir)
+    with open(os.path.join(out_dir, BUNDLE_FILE), encoding="utf-8") as f:
+        assert json.load(f) == before
+
+
+def test_pruned_bundle_goes_to_its_own_dir_with_its_own_threshold(trained, tmp_path):
+    model, X, y = trained
+    registry_dir = str(tmp_path / "registry")
+    full_dir = native_bundle_dir("v0001", registry_dir)
+    pruned_dir = native_bundle_dir("v0001", registry_dir, pruned=True)
+    assert full_dir != pruned_dir
+
+    bundle = export_pruned_bundle(model, list(X.columns), X, y, pruned_dir, model_version="v0001")
+
+    assert not os.path.exists(full_dir)
+    assert 1 <= bundle["num_iteration"] <= bundle["total_iterations"]
+    selection = bundle["selection"]
+    assert selection["selection_rows"] + selection["holdout_rows"] == len(X) // 5
+    assert 0.1 <= bundle["threshold"] < 0.9
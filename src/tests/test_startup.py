@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+# measure_startup importa os módulos reais do comando em um processo novo
+pytest.importorskip("pandas")
+pytest.importorskip("numpy")
+
+from src.main import measure_startup
+
+STARTUP_BUDGET_SECONDS = 1.0
+FORBIDDEN_IMPORTS = {"optuna", "lightgbm", "matplotlib", "seaborn", "boto3", "category_encoders"}
+
+
+@pytest.mark.parametrize("command", ["score", "preprocess"])
+def test_command_starts_fast_without_heavy_imports(command):
+    result = measure_startup(command, repeats=3)
+
+    assert result["seconds"] < STARTUP_BUDGET_SECONDS, result
+    assert not FORBIDDEN_IMPORTS & set(result["heavy_imports"]), result
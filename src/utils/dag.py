@@ -0,0 +1,191 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from src.utils.instrumentation import span
+
+
+@dataclass
+class Node:
+    """
+    Etapa do pipeline. As dependências são inferidas pelos artefatos:
+    um nó depende de quem produz algum dos seus `inputs`.
+    Entradas que nenhum nó produz são artefatos externos (ex: JSONs brutos).
+    retries: novas tentativas em caso de erro (útil para etapas de I/O, como uploads).
+    optional: a falha não interrompe o pipeline; apenas os dependentes são pulados.
+    """
+    name: str
+    func: Callable[[], object]
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    retries: int = 0
+    retry_delay: float = 1.0
+    optional: bool = False
+
+
+class DagExecutionError(RuntimeError):
+    """Um ou mais nós obrigatórios falharam. `failures` mapeia nome -> exceção."""
+
+    def __init__(self, failures: Dict[str, BaseException], skipped: List[str]):
+        self.failures = failures
+        self.skipped = skipped
+        details = "; ".join(f"{name}: {type(e).__name__}: {e}" for name, e in failures.items())
+        message = f"Falha em {len(failures)} etapa(s) -> {details}"
+        if skipped:
+            message += f" | etapas não executadas: {', '.join(skipped)}"
+        super().__init__(message)
+
+
+class Dag:
+    """Grafo de etapas com entradas e saídas declaradas."""
+
+    def __init__(self, nodes: List[Node]):
+        self.nodes = {}
+        producers = {}
+        for node in nodes:
+            if node.name in self.nodes:
+                raise ValueError(f"Nó duplicado: {node.name}")
+            self.nodes[node.name] = node
+            for output in node.outputs:
+                if output in producers:
+                    raise ValueError(f"Artefato '{output}' produzido por '{producers[output]}' e '{node.name}'")
+                producers[output] = node.name
+        self.dependencies = {
+            node.name: sorted({producers[i] for i in node.inputs if i in producers and producers[i] != node.name})
+            for node in nodes
+        }
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        pending = {name: set(deps) for name, deps in self.dependencies.items()}
+        order = []
+        while pending:
+            ready = [name for name, deps in pending.items() if not deps]
+            if not ready:
+                raise ValueError(f"Ciclo entre as etapas: {sorted(pending)}")
+            for name in ready:
+                order.append(name)
+                del pending[name]
+            for deps in pending.values():
+                deps.difference_update(ready)
+        return order
+
+    def dependents(self, name: str) -> List[str]:
+        """Todos os nós que dependem, direta ou indiretamente, de `name`."""
+        result, frontier = set(), [name]
+        while frontier:
+            current = frontier.pop()
+            for other, deps in self.dependencies.items():
+                if current in deps and other not in result:
+                    result.add(other)
+                    frontier.append(other)
+        return [n for n in self.order if n in result]
+
+    def critical_path(self, durations: Dict[str, float]) -> List[str]:
+        """Caminho de maior duração acumulada pelo grafo (limite inferior do tempo total)."""
+        finish, previous = {}, {}
+        for name in self.order:
+            deps = [d for d in self.dependencies[name] if d in finish]
+            best = max(deps, key=lambda d: finish[d], default=None)
+            finish[name] = durations.get(name, 0.0) + (finish[best] if best else 0.0)
+            previous[name] = best
+        if not finish:
+            return []
+        node = max(finish, key=finish.get)
+        path = []
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        return path[::-1]
+
+
+def _run_node(node: Node, t0: float) -> dict:
+    """Executa o nó (com novas tentativas) e retorna seus tempos relativos ao início do pipeline."""
+    start = time.perf_counter()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            with span(node.name, attempt=attempt):
+                node.func()
+            break
+        except Exception as e:
+            if attempt > node.retries:
+                e.dag_attempts = attempt
+                raise
+            delay = node.retry_delay * 2 ** (attempt - 1)
+            print(f"⚠️ Etapa '{node.name}' falhou ({e}); nova tentativa em {delay:.1f}s")
+            time.sleep(delay)
+    end = time.perf_counter()
+    return {"start_s": start - t0, "end_s": end - t0, "duration_s": end - start, "attempts": attempt}
+
+
+def run_dag(dag: Dag, max_workers: Optional[int] = None) -> dict:
+    """
+    Executa o grafo localmente: cada nó é submetido a um pool de threads assim que suas
+    dependências terminam, então etapas independentes rodam em paralelo.
+    Retorna um relatório com os tempos de cada nó e o caminho crítico.
+    Levanta DagExecutionError se algum nó obrigatório falhar (após aguardar os que já estavam rodando).
+    """
+    t0 = time.perf_counter()
+    remaining = {name: set(deps) for name, deps in dag.dependencies.items()}
+    nodes_report, failures, skipped = {}, {}, []
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(dag.nodes) or 1, thread_name_prefix="dag") as executor:
+        running = {}
+
+        def submit_ready():
+            for name in [n for n in dag.order if n in remaining and not remaining[n]]:
+                del remaining[name]
+                running[executor.submit(_run_node, dag.nodes[name], t0)] = name
+
+        submit_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    nodes_report[name] = {**future.result(), "status": "ok"}
+                except Exception as e:
+                    end = time.perf_counter() - t0
+                    nodes_report[name] = {"status": "error", "end_s": end,
+                                          "attempts": getattr(e, "dag_attempts", 1), "error": f"{type(e).__name__}: {e}"}
+                    print(f"❌ Etapa '{name}' falhou: {e}")
+                    if not dag.nodes[name].optional:
+                        failures[name] = e
+                    for dependent in dag.dependents(name):
+                        if remaining.pop(dependent, None) is not None:
+                            skipped.append(dependent)
+                            nodes_report[dependent] = {"status": "skipped"}
+                    continue
+                for deps in remaining.values():
+                    deps.discard(name)
+            submit_ready()
+
+    durations = {name: r["duration_s"] for name, r in nodes_report.items() if "duration_s" in r}
+    report = {
+        "total_wall_s": time.perf_counter() - t0,
+        "sum_stage_s": sum(durations.values()),
+        "critical_path": dag.critical_path(durations),
+        "nodes": {name: nodes_report[name] for name in dag.order if name in nodes_report},
+    }
+    report["critical_path_s"] = sum(durations.get(name, 0.0) for name in report["critical_path"])
+    if failures:
+        print_dag_report(report)
+        raise DagExecutionError(failures, skipped)
+    return report
+
+
+def print_dag_report(report: dict):
+    """Imprime a linha do tempo das etapas e o caminho crítico."""
+    print("\n=== Execução do pipeline (DAG) ===")
+    for name, r in report["nodes"].items():
+        if "duration_s" in r:
+            attempts = f"  ({r['attempts']} tentativas)" if r["attempts"] > 1 else ""
+            print(f"{name:<22} {r['start_s']:>7.1f}s -> {r['end_s']:>7.1f}s  {r['duration_s']:>7.1f}s{attempts}")
+        else:
+            error = f" ({r['error']})" if "error" in r else ""
+            print(f"{name:<22} {r['status']}{error}")
+    print(f"Caminho crítico: {' -> '.join(report['critical_path'])} ({report['critical_path_s']:.1f}s)")
+    print(f"Tempo total: {report['total_wall_s']:.1f}s (soma das etapas: {report['sum_stage_s']:.1f}s)")
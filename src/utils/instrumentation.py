@@ -0,0 +1,269 @@
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Optional
+
+
+# --- Constantes ---
+REPORTS_DIR = r"src/reports/runs"
+
+
+class _Config:
+    """Estado global da instrumentação (desabilitada por padrão)."""
+    enabled = False
+    trace_memory = True
+    profile_stage: Optional[str] = None
+    reports_dir = REPORTS_DIR
+    run_started_at: Optional[str] = None
+    run_wall_start = 0.0
+
+
+_config = _Config()
+_local = threading.local()
+_lock = threading.Lock()
+_records: list = []
+# Spans abertos em todas as threads (para detectar etapas concorrentes)
+_active_spans: set = set()
+
+
+class Span:
+    """
+    Intervalo medido de uma etapa do pipeline.
+    Registra tempo de parede, tempo de CPU, pico de memória (tracemalloc),
+    atributos livres (ex: linhas) e contadores acumulados (ex: bytes transferidos).
+
+    Com etapas rodando em paralelo (ex: DAG do pipeline), `cpu_s` é o CPU da thread da
+    etapa (`thread_time`; não inclui threads nativas, como as do LightGBM) e
+    `process_cpu_s` é o do processo inteiro, compartilhado entre as etapas concorrentes.
+    O pico do tracemalloc é global, então não é atribuível a uma etapa que se sobrepôs
+    a outra thread: nesse caso `peak_memory_mb` é None e `concurrent` é True.
+    """
+
+    def __init__(self, name: str, parent: Optional["Span"], attrs: dict):
+        self.name = name
+        self.parent = parent
+        self.path = f"{parent.path}/{name}" if parent else name
+        self.attrs = dict(attrs)
+        self.counters: dict = {}
+        self.peak_seen = 0
+        self.concurrent = False
+        self._thread_id = threading.get_ident()
+        self._profiler = None
+
+    def set(self, **attrs):
+        """Define atributos da etapa (ex: rows=len(df))."""
+        self.attrs.update(attrs)
+
+    def add(self, **counters):
+        """Soma valores a contadores da etapa (ex: bytes_transferred=n)."""
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def __enter__(self):
+        stack = _stack()
+        with _lock:
+            others = [sp for sp in _active_spans if sp._thread_id != self._thread_id]
+            if others:
+                self.concurrent = True
+                for other in others:
+                    other.concurrent = True
+            _active_spans.add(self)
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        self._process_cpu_start = time.process_time()
+        if _config.trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak_seen = max(stack[-1].peak_seen, peak)
+            tracemalloc.reset_peak()
+            self._mem_start = current
+        else:
+            self._mem_start = None
+        if _config.profile_stage == self.name:
+            try:
+                self._profiler = cProfile.Profile()
+                self._profiler.enable()
+            except ValueError:
+                # Outro profiler já está ativo (ex: etapa aninhada com o mesmo nome)
+                self._profiler = None
+        stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall_start
+        cpu = time.thread_time() - self._cpu_start
+        process_cpu = time.process_time() - self._process_cpu_start
+        with _lock:
+            _active_spans.discard(self)
+        stack = _stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+
+        peak_mb = None
+        if self._mem_start is not None and tracemalloc.is_tracing() and not self.concurrent:
+            peak = max(tracemalloc.get_traced_memory()[1], self.peak_seen)
+            peak_mb = round(max(peak - self._mem_start, 0) / 1024 ** 2, 3)
+            if self.parent is not None:
+                self.parent.peak_seen = max(self.parent.peak_seen, peak)
+
+        profile_path = None
+        if self._profiler is not None:
+            self._profiler.disable()
+            os.makedirs(_config.reports_dir, exist_ok=True)
+            profile_path = os.path.join(_config.reports_dir, f"profile_{self.name}_{_config.run_started_at}.prof")
+            self._profiler.dump_stats(profile_path)
+            self._profiler = None
+
+        record = {
+            "name": self.name,
+            "path": self.path,
+            "thread": threading.current_thread().name,
+            "start_offset_s": round(self._wall_start - _config.run_wall_start, 4),
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+            "process_cpu_s": round(process_cpu, 4),
+            "peak_memory_mb": peak_mb,
+            "concurrent": self.concurrent,
+            "status": "error" if exc_type else "ok",
+            "attrs": self.attrs,
+            "counters": self.counters,
+        }
+        if exc_type:
+            record["error"] = f"{exc_type.__name__}: {exc}"
+        if profile_path:
+            record["profile_path"] = profile_path
+        with _lock:
+            _records.append(record)
+        return False
+
+
+class _NullSpan:
+    """Span sem efeito usado quando a instrumentação está desabilitada."""
+
+    def set(self, **attrs):
+        pass
+
+    def add(self, **counters):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _stack() -> list:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def configure(enabled: bool = True, profile_stage: Optional[str] = None,
+              trace_memory: bool = True, reports_dir: str = REPORTS_DIR):
+    """
+    Habilita (ou desabilita) a instrumentação para a execução atual.
+    profile_stage: nome da etapa que terá um dump do cProfile salvo em reports_dir.
+    trace_memory: mede o pico de memória por etapa via tracemalloc (tem custo extra).
+    """
+    _config.enabled = enabled
+    _config.profile_stage = profile_stage
+    _config.trace_memory = trace_memory
+    _config.reports_dir = reports_dir
+    _config.run_started_at = datetime.now().strftime("%Y%m%d_%H%M%S")
+    _config.run_wall_start = time.perf_counter()
+    with _lock:
+        _records.clear()
+    if enabled and trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not enabled and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def is_enabled() -> bool:
+    return _config.enabled
+
+
+def span(name: str, **attrs):
+    """
+    Context manager que mede uma etapa. Quando desabilitado retorna um span nulo
+    compartilhado, sem custo de medição.
+
+        with span("merge") as s:
+            df = ...
+            s.set(rows=len(df))
+    """
+    if not _config.enabled:
+        return _NULL_SPAN
+    stack = _stack()
+    return Span(name, stack[-1] if stack else None, attrs)
+
+
+def current_span():
+    """Retorna o span ativo na thread atual (ou o span nulo)."""
+    if not _config.enabled:
+        return _NULL_SPAN
+    stack = _stack()
+    return stack[-1] if stack else _NULL_SPAN
+
+
+def instrument(name: Optional[str] = None) -> Callable:
+    """Decorator equivalente a `span`, usando o nome da função por padrão."""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _config.enabled:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def build_report() -> dict:
+    """Monta o relatório da execução com todas as etapas registradas."""
+    with _lock:
+        stages = sorted(_records, key=lambda r: r["start_offset_s"])
+    report = {
+        "started_at": _config.run_started_at,
+        "total_wall_s": round(time.perf_counter() - _config.run_wall_start, 4),
+        "python": sys.version.split()[0],
+        "pid": os.getpid(),
+        "trace_memory": _config.trace_memory,
+        "profile_stage": _config.profile_stage,
+        "notes": ("cpu_s: CPU da thread da etapa; process_cpu_s: CPU do processo, compartilhado entre etapas "
+                  "concorrentes; peak_memory_mb é None em etapas que rodaram junto com outras threads"),
+        "stages": stages,
+    }
+    try:
+        import resource
+        # ru_maxrss é reportado em KB no Linux
+        report["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except ImportError:
+        pass
+    return report
+
+
+def write_report(path: Optional[str] = None) -> Optional[str]:
+    """Salva o relatório JSON da execução. Não faz nada se a instrumentação estiver desabilitada."""
+    if not _config.enabled:
+        return None
+    if path is None:
+        path = os.path.join(_config.reports_dir, f"run_report_{_config.run_started_at}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(build_report(), f, indent=2, ensure_ascii=False, default=str)
+    print(f"Relatório de execução salvo em: {path}")
+    return path
@@ -2,24 +2,29 @@ import pandas as pd
 import joblib
 import os
 import io
-import boto3
-from dotenv import load_dotenv
-from typing import Any
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+from src.utils.instrumentation import span
 
 
 # --- Constantes ---
 PROCESSED_DATA_PATH = r"src/data/processed/feature_engineered_data.csv"
 MODEL_PATH = r"src/models/model.pkl"
+MODEL_COLUMNS_PATH = r"src/models/model_columns.pkl"
 
-import os
-import boto3
+# boto3 e dotenv são importados dentro das funções de S3 para não pesar
+# na inicialização dos comandos que não acessam a AWS.
 
-def upload_csv_to_s3(local_path: str, s3_key: str):
+def upload_csv_to_s3(local_path: str, s3_key: str, raise_on_error: bool = False):
     """
     Faz upload de um arquivo CSV para o S3.
     local_path: caminho local do CSV
     s3_key: caminho/nome que o CSV terá dentro do bucket
+    raise_on_error: propaga o erro do upload (ex: para que o DAG tente novamente)
     """
+    import boto3
+    from dotenv import load_dotenv
     load_dotenv()
     bucket_name = os.getenv("AWS_BUCKET_NAME")
     region_name = os.getenv("AWS_REGION", "us-east-1")
@@ -27,7 +32,9 @@ def upload_csv_to_s3(local_path: str, s3_key: str):
     if not bucket_name:
         raise ValueError("⚠️ Variável de ambiente AWS_BUCKET_NAME não encontrada!")
 
-    s3 = boto3.client(
+    # Uma sessão por chamada: no DAG do pipeline, uploads rodam em paralelo
+    # (a sessão padrão do boto3 não é thread-safe)
+    s3 = boto3.session.Session().client(
         "s3",
         aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
         aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
@@ -35,24 +42,37 @@ def upload_csv_to_s3(local_path: str, s3_key: str):
     )
     
     try:
-        s3.upload_file(local_path, bucket_name, s3_key)
+        with span("s3_upload", key=s3_key) as s:
+            s3.upload_file(local_path, bucket_name, s3_key)
+            s.add(bytes_transferred=os.path.getsize(local_path))
         print(f"✅ CSV enviado para s3://{bucket_name}/{s3_key}")
     except Exception as e:
         print(f"❌ Erro ao realizar upload de arquivo para o S3: {e}")
+        if raise_on_error:
+            raise
 
 def read_csv_s3(bucket_name, key):
+    import boto3
+    from dotenv import load_dotenv
     load_dotenv()
     bucket_name = os.getenv("AWS_BUCKET_NAME")
     region_name = os.getenv("AWS_REGION", "us-east-1")
-    s3 = boto3.client(
+    # Uma sessão por chamada: a sessão padrão do boto3 não é thread-safe
+    # e esta função é chamada em paralelo por load_concurrently
+    s3 = boto3.session.Session().client(
         "s3",
         aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
         aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
         region_name=region_name
     )
 
-    obj = s3.get_object(Bucket=bucket_name, Key=key)
-    return pd.read_csv(io.BytesIO(obj['Body'].read()))
+    with span("s3_read", key=key) as s:
+        obj = s3.get_object(Bucket=bucket_name, Key=key)
+        body = obj['Body'].read()
+        s.add(bytes_transferred=len(body))
+        df = pd.read_csv(io.BytesIO(body))
+        s.set(rows=len(df))
+    return df
 
 def load_model(path: str = MODEL_PATH) -> Any:
     """Carrega um modelo treinado a partir de um arquivo .pkl."""
@@ -88,3 +108,43 @@ def prepare_data_for_prediction(df: pd.DataFrame) -> pd.DataFrame:
     if discarded_cols:
         print(f"Colunas não-numéricas descartadas: {len(discarded_cols)}")
     return df_numeric
+
+
+class ArtifactLoadError(RuntimeError):
+    """Erro ao carregar um ou mais artefatos em paralelo. `failures` mapeia nome -> exceção."""
+
+    def __init__(self, failures: Dict[str, BaseException]):
+        self.failures = failures
+        details = "; ".join(f"{name}: {type(e).__name__}: {e}" for name, e in failures.items())
+        super().__init__(f"Falha ao carregar {len(failures)} artefato(s) -> {details}")
+
+
+def load_concurrently(loaders: Dict[str, Callable[[], Any]], max_workers: int = None,
+                      timings: Dict[str, float] = None) -> Dict[str, Any]:
+    """
+    Executa carregamentos independentes (leitura de arquivos, S3, unpickle) em paralelo
+    e retorna {nome: resultado}. O tempo total fica próximo ao do artefato mais lento.
+    Se algum falhar, aguarda os demais e levanta ArtifactLoadError com todas as falhas.
+    timings: dicionário opcional preenchido com o tempo (s) de cada carregamento.
+    """
+    def _timed(name, loader):
+        start = time.perf_counter()
+        try:
+            return loader()
+        finally:
+            if timings is not None:
+                timings[name] = time.perf_counter() - start
+
+    results, failures = {}, {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(loaders) or 1, thread_name_prefix="loader") as executor:
+        futures = {name: executor.submit(_timed, name, loader) for name, loader in loaders.items()}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                failures[name] = e
+    if failures:
+        for name, e in failures.items():
+            print(f"❌ Erro ao carregar '{name}': {e}")
+        raise ArtifactLoadError(failures)
+    return results